@@ -0,0 +1,177 @@
+"""Benchmark the markdown-to-PDF pipeline on synthetic proposals and research reports.
+
+Times clean_markdown_for_pdf, parse_table and create_formatted_pdf separately for
+documents of increasing size and prints the results as JSON, so runs can be
+saved and compared:
+
+    python bench_pdf_generator.py --sizes 5 20 40 --output bench_output.txt
+"""
+from typing import Callable, Dict, List
+import argparse
+import json
+import platform
+import random
+import re
+import statistics
+import time
+import tracemalloc
+from pdf_generator import clean_markdown_for_pdf, create_formatted_pdf, parse_table
+
+WORDS = (
+    "solution delivery platform integration cloud migration security compliance analytics "
+    "stakeholder roadmap milestone budget scalable architecture support training governance "
+    "workflow automation reporting dashboard pipeline resilience performance onboarding"
+).split()
+
+_PAGE_OBJECT = re.compile(rb'/Type\s*/Page\b(?!s)')
+
+
+def _sentence(rng: random.Random, words: int = 14) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    # Sprinkle inline formatting so the conversion passes have work to do
+    if rng.random() < 0.3:
+        text += f" **{rng.choice(WORDS)}**"
+    if rng.random() < 0.2:
+        text += f" *{rng.choice(WORDS)}*"
+    if rng.random() < 0.1:
+        text += f" `{rng.choice(WORDS)}`"
+    return text.capitalize() + "."
+
+
+def _table(rng: random.Random, rows: int, columns: int) -> str:
+    header = "| " + " | ".join(f"Column {i + 1}" for i in range(columns)) + " |"
+    separator = "|" + "---|" * columns
+    body = [
+        "| " + " | ".join(
+            _sentence(rng, 8) if column == 1 and rng.random() < 0.2 else f"{rng.choice(WORDS)} {rng.randint(1, 9999)}"
+            for column in range(columns)
+        ) + " |"
+        for _ in range(rows)
+    ]
+    return "\n".join([header, separator, *body])
+
+
+def synthetic_proposal(sections: int, seed: int = 0) -> str:
+    """A proposal in the shape proposal_to_markdown produces: sections of prose, bullets and quote tables."""
+    rng = random.Random(seed)
+    parts = ["# Proposal for Benchmark Client - Synthetic Project\n"]
+    for section in range(sections):
+        parts.append(f"## {section + 1}. {_sentence(rng, 4)[:-1]}\n")
+        for _ in range(3):
+            parts.append(" ".join(_sentence(rng) for _ in range(5)) + "\n")
+        parts.append("\n".join(f"- {_sentence(rng, 8)}" for _ in range(8)) + "\n")
+        if section % 2 == 0:
+            parts.append(_table(rng, rows=25, columns=5) + "\n")
+    return "\n".join(parts)
+
+
+def synthetic_report(sections: int, seed: int = 0) -> str:
+    """A research report: deep header nesting, long bullet lists and large data tables."""
+    rng = random.Random(seed)
+    parts = ["# Market Research Report\n"]
+    for section in range(sections):
+        parts.append(f"## {section + 1}. {_sentence(rng, 4)[:-1]}\n")
+        for depth in range(3, 6):
+            parts.append(f"{'#' * depth} {_sentence(rng, 3)[:-1]}\n")
+            parts.append(" ".join(_sentence(rng) for _ in range(4)) + "\n")
+            parts.append("\n".join(f"* {_sentence(rng, 10)}" for _ in range(12)) + "\n")
+        parts.append(_table(rng, rows=120, columns=7) + "\n")
+    return "\n".join(parts)
+
+
+DOCUMENT_KINDS: Dict[str, Callable[[int, int], str]] = {
+    "proposal": synthetic_proposal,
+    "report": synthetic_report,
+}
+
+
+def _measure(function: Callable[[], object], repeat: int) -> dict:
+    """Time `function` over several runs and record the peak memory of one run."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    # Traced separately: tracemalloc slows allocation-heavy code enough to skew the timings
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "median_seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "runs": repeat,
+        "peak_memory_kb": peak / 1024,
+    }
+
+
+def benchmark_document(kind: str, sections: int, repeat: int) -> dict:
+    """Benchmark each pipeline stage on one synthetic document."""
+    markdown = DOCUMENT_KINDS[kind](sections)
+    markdown_kb = len(markdown.encode("utf-8")) / 1024
+    structured_content = clean_markdown_for_pdf(markdown)
+    tables = [item["content"] for item in structured_content if item["type"] == "table"]
+    table_kb = sum(len(line.encode("utf-8")) for table in tables for line in table) / 1024
+    pages = len(_PAGE_OBJECT.findall(create_formatted_pdf(markdown).getvalue()))
+
+    def parse_all_tables():
+        for table in tables:
+            parse_table(table)
+
+    results = {
+        "clean_markdown_for_pdf": _measure(lambda: clean_markdown_for_pdf(markdown), repeat),
+        "parse_table": _measure(parse_all_tables, repeat),
+        "create_formatted_pdf": _measure(lambda: create_formatted_pdf(markdown), repeat),
+    }
+    # Throughput is measured against the input each function actually reads
+    input_kb = {"clean_markdown_for_pdf": markdown_kb, "parse_table": table_kb, "create_formatted_pdf": markdown_kb}
+    for name, result in results.items():
+        seconds = result["median_seconds"]
+        result["kb_per_second"] = input_kb[name] / seconds if seconds else 0.0
+    render_seconds = results["create_formatted_pdf"]["median_seconds"]
+    results["create_formatted_pdf"]["pages_per_second"] = pages / render_seconds if render_seconds else 0.0
+
+    return {
+        "kind": kind,
+        "sections": sections,
+        "markdown_kb": markdown_kb,
+        "blocks": len(structured_content),
+        "table_kb": table_kb,
+        "tables": len(tables),
+        "table_rows": sum(len(table) for table in tables),
+        "pages": pages,
+        "functions": results,
+    }
+
+
+def run_benchmarks(kinds: List[str], sizes: List[int], repeat: int) -> dict:
+    """Benchmark every document kind at every size."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": [benchmark_document(kind, sections, repeat) for kind in kinds for sections in sizes],
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown-to-PDF pipeline")
+    parser.add_argument("--kinds", nargs="+", choices=sorted(DOCUMENT_KINDS), default=sorted(DOCUMENT_KINDS),
+                        help="Synthetic document kinds to benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[5, 20, 40],
+                        help="Document sizes, in sections")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per function")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run_benchmarks(args.kinds, args.sizes, args.repeat)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
@@ -0,0 +1,197 @@
+from html import escape
+from typing import Dict, Iterable, Iterator, List, Tuple
+import io
+import os
+import re
+from pdf_generator import clean_markdown_for_pdf, create_formatted_pdf, fix_html_content, get_theme_styles, parse_table, temp_path_beside
+
+# Formats export_document can produce
+EXPORT_FORMATS = ("pdf", "html", "docx")
+
+# The only inline tags in structured content (see clean_markdown_for_pdf)
+_INLINE_TAG = re.compile(r'(</?(?:b|i|code)>)')
+
+# Text run: (text, bold, italic, code)
+Run = Tuple[str, bool, bool, bool]
+
+
+def inline_runs(text: str) -> Iterator[Run]:
+    """Split structured-content text into formatted runs, dropping the tags."""
+    depth = {"b": 0, "i": 0, "code": 0}
+    for part in _INLINE_TAG.split(fix_html_content(text)):
+        if not part:
+            continue
+        if _INLINE_TAG.fullmatch(part):
+            name = part.strip("</>")
+            # A stray closing tag must not cancel formatting opened later
+            depth[name] = max(depth[name] + (-1 if part.startswith("</") else 1), 0)
+            continue
+        yield part, depth["b"] > 0, depth["i"] > 0, depth["code"] > 0
+
+
+def _inline_html(text: str) -> str:
+    html = []
+    for part, bold, italic, code in inline_runs(text):
+        part = escape(part, quote=False)
+        if code:
+            part = f"<code>{part}</code>"
+        if italic:
+            part = f"<em>{part}</em>"
+        if bold:
+            part = f"<strong>{part}</strong>"
+        html.append(part)
+    return "".join(html)
+
+
+def _blocks(structured_content: List[dict]) -> Iterator[Tuple[str, dict]]:
+    """Yield (kind, item) with headers mapped to title/section/subsection as in the PDF."""
+    first_header = True
+    for item in structured_content:
+        if item['type'] == 'header':
+            if first_header:
+                first_header = False
+                yield 'title', item
+            else:
+                yield ('section' if item['level'] <= 2 else 'subsection'), item
+        else:
+            yield item['type'], item
+
+
+def structured_content_to_html(structured_content: List[dict], theme="default") -> str:
+    """Render structured content as a standalone HTML document styled after the PDF theme."""
+    theme = get_theme_styles(theme).theme
+    html = [
+        "<!DOCTYPE html>",
+        '<html><head><meta charset="utf-8"><style>',
+        f"body {{ font-family: {theme.font}, sans-serif; font-size: 11pt; line-height: 1.3; max-width: 7in; }}",
+        f"h1 {{ color: {theme.title_color}; font-size: 20pt; }}",
+        f"h2, h3 {{ color: {theme.heading_color}; }}",
+        "table { border-collapse: collapse; margin: 8px 0; }",
+        f"th, td {{ border: 0.5px solid {theme.table_grid_color}; padding: 6px 8px; text-align: left; }}",
+        f"th {{ background: {theme.table_header_background}; color: {theme.heading_color}; }}",
+        f"tbody tr:nth-child(even) {{ background: {theme.table_alternate_background}; }}",
+        "</style></head><body>",
+    ]
+    tags = {'title': 'h1', 'section': 'h2', 'subsection': 'h3'}
+    for kind, item in _blocks(structured_content):
+        if kind in tags:
+            html.append(f"<{tags[kind]}>{_inline_html(item['content'])}</{tags[kind]}>")
+        elif kind == 'paragraph':
+            html.append(f"<p>{_inline_html(item['content'])}</p>")
+        elif kind == 'bullets':
+            html.append("<ul>" + "".join(f"<li>{_inline_html(bullet)}</li>" for bullet in item['content']) + "</ul>")
+        elif kind == 'table':
+            rows = parse_table(item['content'])
+            if not rows:
+                continue
+            header = "".join(f"<th>{_inline_html(cell)}</th>" for cell in rows[0])
+            body = "".join(
+                "<tr>" + "".join(f"<td>{_inline_html(cell)}</td>" for cell in row) + "</tr>"
+                for row in rows[1:]
+            )
+            html.append(f"<table><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>")
+    html.append("</body></html>")
+    return "\n".join(html)
+
+
+def _add_runs(paragraph, text: str) -> None:
+    for part, bold, italic, code in inline_runs(text):
+        run = paragraph.add_run(part)
+        # Only touch formatting that is set; assigning None still adds an empty run-properties element
+        if bold:
+            run.bold = True
+        if italic:
+            run.italic = True
+        if code:
+            run.font.name = "Courier New"
+
+
+def _add_paragraph(document, style_id=None):
+    paragraph = document.add_paragraph()
+    if style_id:
+        # Set the style id directly; assigning a style by name scans the style table on every call
+        paragraph._p.style = style_id
+    return paragraph
+
+
+def structured_content_to_docx(structured_content: List[dict]):
+    """Render structured content as a python-docx Document."""
+    import docx
+
+    document = docx.Document()
+    style_ids = {
+        kind: document.styles[name].style_id
+        for kind, name in (('title', 'Title'), ('section', 'Heading 1'), ('subsection', 'Heading 2'), ('bullets', 'List Bullet'))
+    }
+    for kind, item in _blocks(structured_content):
+        if kind in ('title', 'section', 'subsection'):
+            _add_runs(_add_paragraph(document, style_ids[kind]), item['content'])
+        elif kind == 'paragraph':
+            _add_runs(_add_paragraph(document), item['content'])
+        elif kind == 'bullets':
+            for bullet in item['content']:
+                _add_runs(_add_paragraph(document, style_ids['bullets']), bullet)
+        elif kind == 'table':
+            rows = parse_table(item['content'])
+            if not rows:
+                continue
+            column_count = len(rows[0])
+            table = document.add_table(rows=0, cols=column_count)
+            table.style = 'Table Grid'
+            for row_index, row in enumerate(rows):
+                # Extra cells in ragged rows are dropped, missing ones left empty
+                for cell, text in zip(table.add_row().cells, row[:column_count]):
+                    _add_runs(cell.paragraphs[0], f"<b>{text}</b>" if row_index == 0 else text)
+    return document
+
+
+def _write(data: bytes, output=None):
+    """Write exported bytes like create_formatted_pdf: BytesIO by default, else a path or stream."""
+    if output is None:
+        return io.BytesIO(data)
+    if isinstance(output, (str, os.PathLike)):
+        tmp_path = temp_path_beside(output)
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, output)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return output
+    output.write(data)
+    return output
+
+
+def export_html(markdown_content: str, output=None, theme="default", structured_content=None):
+    """Export markdown as HTML, returned in a BytesIO unless `output` is a path or stream."""
+    if structured_content is None:
+        structured_content = clean_markdown_for_pdf(markdown_content)
+    return _write(structured_content_to_html(structured_content, theme).encode("utf-8"), output)
+
+
+def export_docx(markdown_content: str, output=None, structured_content=None):
+    """Export markdown as a Word document, returned in a BytesIO unless `output` is a path or stream."""
+    if structured_content is None:
+        structured_content = clean_markdown_for_pdf(markdown_content)
+    buffer = io.BytesIO()
+    structured_content_to_docx(structured_content).save(buffer)
+    return _write(buffer.getvalue(), output)
+
+
+def export_document(markdown_content: str, formats: Iterable[str] = EXPORT_FORMATS, theme="default") -> Dict[str, io.BytesIO]:
+    """Export markdown to several formats from a single parse, keyed by format."""
+    formats = list(formats)
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown export format(s) {', '.join(unknown)}. Available formats: {', '.join(EXPORT_FORMATS)}")
+    structured_content = clean_markdown_for_pdf(markdown_content)
+    exports = {}
+    for fmt in formats:
+        if fmt == "pdf":
+            exports[fmt] = create_formatted_pdf(markdown_content, theme=theme, structured_content=structured_content)
+        elif fmt == "html":
+            exports[fmt] = export_html(markdown_content, theme=theme, structured_content=structured_content)
+        else:
+            exports[fmt] = export_docx(markdown_content, structured_content=structured_content)
+    return exports
@@ -0,0 +1,119 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Tuple, Union
+import io
+import os
+from agno.document import Document
+from agno.document.reader.csv_reader import CSVReader
+from agno.document.reader.pdf_reader import PDFReader
+from agno.document.reader.text_reader import TextReader
+from proposal_chunking import chunk_by_section
+
+# Extensions the knowledge base can ingest
+KNOWLEDGE_FILE_TYPES = ("pdf", "csv", "txt")
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# (source key, file name, file content) for one file to parse
+ParseJob = Tuple[str, str, Buffer]
+
+
+def file_extension(file_name: str) -> str:
+    return file_name.lower().split('.')[-1]
+
+
+def open_buffer(file_name: str, data: Buffer) -> io.BytesIO:
+    """Wrap in-memory file content in a named stream the agno readers accept."""
+    # BytesIO shares a bytes object's memory until written to; memoryviews (Streamlit's
+    # getbuffer()) and bytearrays are copied once here
+    buffer = io.BytesIO(data)
+    buffer.name = file_name
+    return buffer
+
+
+def iter_pdf_pages(data: Buffer) -> Iterator[str]:
+    """Yield the text of each PDF page in turn without writing the file to disk."""
+    from pypdf import PdfReader
+
+    for page in PdfReader(open_buffer("document.pdf", data)).pages:
+        yield page.extract_text() or ""
+
+
+def read_document_bytes(file_name: str, data: Buffer, chunk: bool = False) -> List[Document]:
+    """Parse an uploaded knowledge-base file straight from memory.
+
+    PDF and text files are returned unchunked by default so they can be
+    chunked by proposal section; CSV files keep the reader's own row chunking.
+    Raises ValueError for unsupported file types and for files nothing could be
+    read from.
+    """
+    extension = file_extension(file_name)
+    if extension == 'pdf':
+        reader = PDFReader(chunk=chunk)
+    elif extension == 'csv':
+        reader = CSVReader()
+    elif extension == 'txt':
+        reader = TextReader(chunk=chunk)
+    else:
+        raise ValueError(f"Unsupported file type for {file_name}. Supported types: {', '.join(KNOWLEDGE_FILE_TYPES)}")
+    documents = reader.read(open_buffer(file_name, data))
+    if not documents and len(data):
+        # The agno readers log their own exceptions and return [], so a corrupt file looks empty
+        raise ValueError(f"No content could be read from {file_name}; it may be corrupt or contain no text")
+    return documents
+
+
+def extract_text_from_bytes(file_name: str, data: Buffer) -> str:
+    """Extract plain text from an uploaded requirements document (pdf, txt or docx)."""
+    extension = file_extension(file_name)
+    if extension == 'pdf':
+        return '\n\n'.join(iter_pdf_pages(data))
+    if extension == 'txt':
+        return str(data, 'utf-8')
+    if extension == 'docx':
+        import docx
+
+        document = docx.Document(open_buffer(file_name, data))
+        return '\n\n'.join(para.text for para in document.paragraphs)
+    return ""
+
+
+def parse_knowledge_file(file_name: str, data: Buffer, section_names: List[str]) -> List[Document]:
+    """Read one knowledge-base file and chunk it by proposal section (CSV rows stay as read)."""
+    documents = read_document_bytes(file_name, data)
+    if documents and file_extension(file_name) != 'csv':
+        documents = chunk_by_section(documents, section_names)
+    return documents
+
+
+def parse_files_in_parallel(
+    jobs: List[ParseJob],
+    section_names: List[str],
+    max_workers: Optional[int] = None,
+) -> Iterator[Tuple[str, Optional[List[Document]], Optional[str]]]:
+    """Parse files across a process pool, yielding (source, documents, error) as each one finishes.
+
+    PDF text extraction is CPU-bound, so files are parsed in separate processes
+    while the caller consumes results (and reports progress) on its own thread.
+    A file that fails to parse yields its error message instead of stopping the batch.
+    """
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        # Not worth starting a pool for a single file
+        for source, file_name, data in jobs:
+            try:
+                yield source, parse_knowledge_file(file_name, data, section_names), None
+            except Exception as e:
+                yield source, None, str(e)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # memoryviews can't be pickled, so hand the workers plain bytes
+        futures = {
+            executor.submit(parse_knowledge_file, file_name, bytes(data), section_names): source
+            for source, file_name, data in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, str(e)
@@ -0,0 +1,183 @@
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from agno.embedder.base import Embedder
+from agno.embedder.google import GeminiEmbedder
+
+# Cache file location
+cache_db_file = "data/embedding_cache.sqlite"
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH_SIZE = 500
+
+
+def content_hash(text: str) -> str:
+    """Hash text content for use as an embedding cache key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def embed_batch(embedder: Embedder, texts: List[str]) -> List[List[float]]:
+    """Embed several texts, using a single request when the embedder supports it.
+
+    Raises ValueError if the embedder returns a different number of vectors than texts.
+    """
+    if not texts:
+        return []
+    if isinstance(embedder, CachedEmbedder):
+        vectors = embedder.get_embeddings(texts)
+    elif isinstance(embedder, GeminiEmbedder):
+        # The Gemini embed_content endpoint accepts a list of contents per request
+        model_id = embedder.id.split("/")[-1]
+        config: Dict[str, object] = {}
+        if embedder.dimensions:
+            config["output_dimensionality"] = embedder.dimensions
+        if embedder.task_type:
+            config["task_type"] = embedder.task_type
+        request: Dict[str, object] = {"model": model_id, "contents": texts}
+        if config:
+            request["config"] = config
+        if embedder.request_params:
+            request.update(embedder.request_params)
+        response = embedder.client.models.embed_content(**request)
+        vectors = [list(embedding.values or []) for embedding in response.embeddings or []]
+    else:
+        vectors = [embedder.get_embedding(text) for text in texts]
+    if len(vectors) != len(texts):
+        # Vectors are matched to texts by position, so a short response can't be lined up at all
+        raise ValueError(f"Embedder returned {len(vectors)} vectors for {len(texts)} texts")
+    return vectors
+
+
+class EmbeddingCache:
+    """Persistent embedding cache keyed by content hash and embedder model id."""
+
+    def __init__(self, db_file: str = cache_db_file, max_entries: int = 200_000):
+        """Open (or create) the cache database."""
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_file = db_file
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                key TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, key)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def get_many(self, model: str, keys: List[str]) -> Dict[str, List[float]]:
+        """Look up cached vectors for many content hashes at once."""
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(unique_keys), _LOOKUP_BATCH_SIZE):
+                batch = unique_keys[start:start + _LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+                if rows:
+                    hit_placeholders = ",".join("?" * len(rows))
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE model = ? AND key IN ({hit_placeholders})",
+                        [now, model, *[key for key, _ in rows]],
+                    )
+            self._conn.commit()
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        """Store vectors for many content hashes and evict old entries if needed."""
+        if not vectors:
+            return
+        now = time.time()
+        rows = [(model, key, array("f", vector).tobytes(), now) for key, vector in vectors.items() if vector]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop the least recently used entries once the cache exceeds max_entries."""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count <= self.max_entries:
+                return 0
+            # Evict down to 90% so we don't run eviction on every insert
+            excess = count - int(self.max_entries * 0.9)
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+            self._conn.commit()
+        return excess
+
+
+@dataclass
+class CachedEmbedder(Embedder):
+    """Embedder wrapper that serves repeated texts from an EmbeddingCache."""
+
+    embedder: Optional[Embedder] = None
+    cache: Optional[EmbeddingCache] = None
+
+    def __post_init__(self):
+        if self.embedder is None:
+            raise ValueError("CachedEmbedder requires an embedder to wrap")
+        self.dimensions = self.embedder.dimensions
+        if self.cache is None:
+            self.cache = EmbeddingCache()
+
+    @property
+    def id(self) -> str:
+        return getattr(self.embedder, "id", type(self.embedder).__name__)
+
+    @property
+    def model_key(self) -> str:
+        """Cache namespace: vectors are only reusable for the same model settings."""
+        task_type = getattr(self.embedder, "task_type", None)
+        return f"{self.id}:{self.dimensions}:{task_type}"
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Embed many texts, calling the wrapped embedder only for cache misses."""
+        keys = [content_hash(text) for text in texts]
+        cached = self.cache.get_many(self.model_key, keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        # embed_batch checks the count, so zip can't silently pair texts with the wrong vectors
+        fresh = dict(zip(missing, embed_batch(self.embedder, list(missing.values()))))
+        self.cache.put_many(self.model_key, fresh)
+        cached.update(fresh)
+        return [cached.get(key, []) for key in keys]
+
+    def get_embedding(self, text: str) -> List[float]:
+        return self.get_embeddings([text])[0]
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        key = content_hash(text)
+        cached = self.cache.get_many(self.model_key, [key])
+        if key in cached:
+            return cached[key], None
+        embedding, usage = self.embedder.get_embedding_and_usage(text)
+        self.cache.put_many(self.model_key, {key: embedding})
+        return embedding, usage
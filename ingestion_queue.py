@@ -0,0 +1,294 @@
+from typing import Dict, List, Optional
+import os
+import sqlite3
+import threading
+import time
+from agno.utils.log import logger
+from document_readers import Buffer, parse_files_in_parallel
+from knowledge_ingestion import KnowledgeManifest, default_manifest_path, ingest_sources
+
+# Queue file location
+queue_db_file = "data/ingestion_queue.sqlite"
+
+# Job states, in the order a job moves through them
+QUEUED, PARSING, EMBEDDING, DONE, FAILED = "queued", "parsing", "embedding", "done", "failed"
+
+# One worker per vector table per process
+_workers: Dict[str, "IngestionWorker"] = {}
+_workers_lock = threading.Lock()
+
+
+class IngestionQueue:
+    """Persistent queue of knowledge-base files waiting to be parsed, embedded and stored."""
+
+    def __init__(self, db_file: str = queue_db_file):
+        """Open (or create) the queue database."""
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                owner TEXT,
+                file_hash TEXT NOT NULL,
+                content BLOB,
+                status TEXT NOT NULL,
+                chunks INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                enqueued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )"""
+        )
+        if "owner" not in {row["name"] for row in self._conn.execute("PRAGMA table_info(ingestion_jobs)")}:
+            # Queues created before jobs recorded who uploaded them
+            self._conn.execute("ALTER TABLE ingestion_jobs ADD COLUMN owner TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status ON ingestion_jobs (status, id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_owner ON ingestion_jobs (owner, id)")
+        self._conn.commit()
+
+    def enqueue(self, source: str, file_name: str, data: Buffer, source_hash: str, owner: Optional[str] = None) -> Optional[int]:
+        """Queue a file for ingestion, returning its job id.
+
+        Returns None if the same content is already waiting or being processed.
+        A queued job for an older version of the same source is replaced.
+        `owner` tags the job with whoever queued it, for jobs() and stats().
+        """
+        with self._lock:
+            pending = self._conn.execute(
+                "SELECT id, file_hash, status FROM ingestion_jobs WHERE source = ? AND status IN (?, ?, ?)",
+                (source, QUEUED, PARSING, EMBEDDING),
+            ).fetchall()
+            if any(row["file_hash"] == source_hash for row in pending):
+                return None
+            self._conn.execute(
+                "DELETE FROM ingestion_jobs WHERE source = ? AND status = ?",
+                (source, QUEUED),
+            )
+            cursor = self._conn.execute(
+                "INSERT INTO ingestion_jobs (source, file_name, owner, file_hash, content, status, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (source, file_name, owner, source_hash, bytes(data), QUEUED, time.time()),
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def claim(self, limit: int) -> List[sqlite3.Row]:
+        """Take up to `limit` of the oldest queued jobs and mark them as being parsed."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, source, file_name, file_hash, content FROM ingestion_jobs "
+                "WHERE status = ? ORDER BY id LIMIT ?",
+                (QUEUED, limit),
+            ).fetchall()
+            if rows:
+                placeholders = ",".join("?" * len(rows))
+                self._conn.execute(
+                    f"UPDATE ingestion_jobs SET status = ?, started_at = ? WHERE id IN ({placeholders})",
+                    [PARSING, time.time(), *[row["id"] for row in rows]],
+                )
+                self._conn.commit()
+            return rows
+
+    def set_status(self, job_ids: List[int], status: str, error: Optional[str] = None) -> None:
+        """Move jobs to a new state; finished jobs drop their stored file content."""
+        if not job_ids:
+            return
+        finished = status in (DONE, FAILED)
+        placeholders = ",".join("?" * len(job_ids))
+        with self._lock:
+            if finished:
+                self._conn.execute(
+                    f"UPDATE ingestion_jobs SET status = ?, error = ?, finished_at = ?, content = NULL "
+                    f"WHERE id IN ({placeholders})",
+                    [status, error, time.time(), *job_ids],
+                )
+            else:
+                self._conn.execute(
+                    f"UPDATE ingestion_jobs SET status = ? WHERE id IN ({placeholders})",
+                    [status, *job_ids],
+                )
+            self._conn.commit()
+
+    def fail_unfinished(self, job_ids: List[int], error: str) -> None:
+        """Mark jobs as failed, leaving any that already finished or failed with their own result."""
+        if not job_ids:
+            return
+        placeholders = ",".join("?" * len(job_ids))
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE ingestion_jobs SET status = ?, error = ?, finished_at = ?, content = NULL "
+                f"WHERE id IN ({placeholders}) AND status NOT IN (?, ?)",
+                [FAILED, error, time.time(), *job_ids, DONE, FAILED],
+            )
+            self._conn.commit()
+
+    def set_chunks(self, chunk_counts: Dict[int, int]) -> None:
+        """Record how many chunks each job's file produced."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE ingestion_jobs SET chunks = ? WHERE id = ?",
+                [(chunks, job_id) for job_id, chunks in chunk_counts.items()],
+            )
+            self._conn.commit()
+
+    def requeue_interrupted(self) -> int:
+        """Put jobs that were in flight when the process stopped back in the queue."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE ingestion_jobs SET status = ?, started_at = NULL WHERE status IN (?, ?)",
+                (QUEUED, PARSING, EMBEDDING),
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    @staticmethod
+    def _owner_filter(owner: Optional[str]):
+        return ("AND owner = ?", (owner,)) if owner is not None else ("", ())
+
+    def jobs(self, limit: int = 50, owner: Optional[str] = None) -> List[dict]:
+        """Return the most recent jobs, newest first, optionally only those queued by `owner`."""
+        owner_clause, owner_params = self._owner_filter(owner)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, file_name, status, chunks, error, enqueued_at, started_at, finished_at "
+                f"FROM ingestion_jobs WHERE 1 = 1 {owner_clause} ORDER BY id DESC LIMIT ?",
+                (*owner_params, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self, window: float = 600.0, owner: Optional[str] = None) -> dict:
+        """Summarise job counts, recent throughput and failures, optionally only for `owner`'s jobs.
+
+        Throughput covers files finished in the last `window` seconds, measured
+        from when the first of them started.
+        """
+        since = time.time() - window
+        owner_clause, owner_params = self._owner_filter(owner)
+        with self._lock:
+            counts = dict(
+                self._conn.execute(
+                    f"SELECT status, COUNT(*) FROM ingestion_jobs WHERE 1 = 1 {owner_clause} GROUP BY status",
+                    owner_params,
+                ).fetchall()
+            )
+            files, chunks, first_started, last_finished = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(chunks), 0), MIN(started_at), MAX(finished_at) "
+                f"FROM ingestion_jobs WHERE status = ? AND finished_at >= ? {owner_clause}",
+                (DONE, since, *owner_params),
+            ).fetchone()
+            failures = self._conn.execute(
+                f"SELECT file_name, error, finished_at FROM ingestion_jobs WHERE status = ? {owner_clause} "
+                "ORDER BY id DESC LIMIT 20",
+                (FAILED, *owner_params),
+            ).fetchall()
+
+        elapsed = (last_finished - first_started) if files else 0.0
+        return {
+            "counts": {status: counts.get(status, 0) for status in (QUEUED, PARSING, EMBEDDING, DONE, FAILED)},
+            "files_per_second": files / elapsed if elapsed > 0 else 0.0,
+            "chunks_per_second": chunks / elapsed if elapsed > 0 else 0.0,
+            "failures": [dict(row) for row in failures],
+        }
+
+    def is_idle(self) -> bool:
+        """Return True if no job is waiting or in progress."""
+        counts = self.stats()["counts"]
+        return not (counts[QUEUED] or counts[PARSING] or counts[EMBEDDING])
+
+
+class IngestionWorker(threading.Thread):
+    """Background thread that drains the ingestion queue into the vector store."""
+
+    def __init__(
+        self,
+        vector_db,
+        queue: IngestionQueue,
+        section_names: List[str],
+        batch_size: int = 20,
+        poll_interval: float = 5.0,
+        **ingest_kwargs,
+    ):
+        """Initialize the worker; call start() to begin processing."""
+        super().__init__(name=f"ingestion-{vector_db.table_name}", daemon=True)
+        self.vector_db = vector_db
+        self.queue = queue
+        self.section_names = section_names
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.ingest_kwargs = ingest_kwargs
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+    def notify(self) -> None:
+        """Wake the worker after new files are queued."""
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wake.set()
+
+    def run(self) -> None:
+        requeued = self.queue.requeue_interrupted()
+        if requeued:
+            logger.info(f"Resuming {requeued} interrupted ingestion jobs")
+        while not self._stop_event.is_set():
+            jobs = self.queue.claim(self.batch_size)
+            if not jobs:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            try:
+                self.process(jobs)
+            except Exception as e:
+                logger.error(f"Error ingesting queued files: {e}")
+                # Files that already failed to parse keep their own error
+                self.queue.fail_unfinished([job["id"] for job in jobs], str(e))
+
+    def process(self, jobs: List[sqlite3.Row]) -> None:
+        """Parse a batch of jobs in parallel, then embed and store their chunks in one write."""
+        jobs_by_id = {str(job["id"]): job for job in jobs}
+        parse_jobs = [(job_id, job["file_name"], job["content"]) for job_id, job in jobs_by_id.items()]
+
+        sources = {}
+        source_hashes = {}
+        chunk_counts = {}
+        for job_id, documents, error in parse_files_in_parallel(parse_jobs, self.section_names):
+            job = jobs_by_id[job_id]
+            if error or not documents:
+                self.queue.set_status([job["id"]], FAILED, error or "No content could be read from the file")
+                continue
+            sources[job["source"]] = documents
+            source_hashes[job["source"]] = job["file_hash"]
+            chunk_counts[job["id"]] = len(documents)
+
+        if not sources:
+            return
+        self.queue.set_chunks(chunk_counts)
+        self.queue.set_status(list(chunk_counts), EMBEDDING)
+        manifest = KnowledgeManifest(default_manifest_path(self.vector_db))
+        try:
+            result = ingest_sources(self.vector_db, sources, source_hashes, manifest, **self.ingest_kwargs)
+        finally:
+            manifest.close()
+        self.queue.set_status(list(chunk_counts), DONE)
+        logger.info(f"Ingested {len(sources)} queued files ({result['added']} new chunks, {result['removed']} removed)")
+
+
+def get_ingestion_worker(vector_db, section_names: List[str], queue: Optional[IngestionQueue] = None) -> IngestionWorker:
+    """Return the running worker for a vector table, starting one if needed."""
+    key = f"{vector_db.uri}:{vector_db.table_name}"
+    with _workers_lock:
+        worker = _workers.get(key)
+        if worker is None or not worker.is_alive():
+            worker = IngestionWorker(vector_db, queue or IngestionQueue(), section_names)
+            worker.start()
+            _workers[key] = worker
+        return worker
@@ -0,0 +1,383 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from hashlib import md5, sha256
+from typing import Dict, Iterable, List, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+from agno.document import Document
+from agno.utils.log import logger
+from embedding_cache import embed_batch
+from vector_index import TEXT_COLUMN, ensure_text_column, maintain_vector_store, refresh_table, table_lock
+
+# Keep filter expressions short when checking which chunks already exist
+_ID_LOOKUP_BATCH_SIZE = 500
+
+
+class RateLimiter:
+    """Spread requests evenly to stay under a requests-per-minute budget."""
+
+    def __init__(self, requests_per_minute: int):
+        """Initialize the rate limiter."""
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        """Block until the caller may send its next request."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def document_id(content: str) -> str:
+    """Return the row id LanceDb uses for a chunk (md5 of its cleaned content)."""
+    return md5(content.replace("\x00", "\ufffd").encode()).hexdigest()
+
+
+def file_hash(data: bytes) -> str:
+    """Hash the raw bytes of a source file."""
+    return sha256(data).hexdigest()
+
+
+def default_manifest_path(vector_db) -> str:
+    """Place the manifest next to the LanceDB directory, one file per table."""
+    parent = os.path.dirname(str(vector_db.uri).rstrip("/"))
+    return os.path.join(parent, f"{vector_db.table_name}_manifest.sqlite")
+
+
+def source_key(path: str) -> str:
+    """Manifest key for a source file: its file name, as uploads through the page only have that."""
+    return os.path.basename(path)
+
+
+class KnowledgeManifest:
+    """Track which source files and chunks are already in the vector store.
+
+    Sources are keyed by file name (see source_key). Entries live in SQLite,
+    so the page's ingestion worker and CLI loaders can update the manifest at
+    the same time without overwriting each other's changes.
+    """
+
+    def __init__(self, path: str):
+        """Open (or create) the manifest database."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Re-entrant: updates made inside transaction() take the lock again
+        self._lock = threading.RLock()
+        # Autocommit; transaction() groups statements explicitly
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                file_hash TEXT NOT NULL,
+                path TEXT,
+                chunks TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._import_legacy_json()
+
+    def _import_legacy_json(self) -> None:
+        """Carry entries over from the JSON manifest earlier versions wrote."""
+        legacy_path = os.path.splitext(self.path)[0] + ".json"
+        try:
+            with open(legacy_path, "r") as f:
+                legacy_sources = json.load(f).get("sources", {})
+        except FileNotFoundError:
+            return
+        with self.transaction():
+            for source, entry in legacy_sources.items():
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO sources (source, file_hash, path, chunks, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        source_key(source),
+                        entry.get("file_hash", ""),
+                        source if os.path.isabs(source) else None,
+                        json.dumps(entry.get("chunks", [])),
+                        entry.get("updated_at", time.time()),
+                    ),
+                )
+        try:
+            os.replace(legacy_path, f"{legacy_path}.imported")
+        except FileNotFoundError:
+            # Another process imported it at the same time
+            pass
+
+    @contextmanager
+    def transaction(self):
+        """Hold the manifest's write lock, so reading and updating chunk references is atomic across processes."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def __contains__(self, source: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM sources WHERE source = ?", (source,)).fetchone() is not None
+
+    def is_unchanged(self, source: str, source_hash: str) -> bool:
+        """Return True if this exact file content was already indexed."""
+        with self._lock:
+            row = self._conn.execute("SELECT file_hash FROM sources WHERE source = ?", (source,)).fetchone()
+        return row is not None and row[0] == source_hash
+
+    def chunk_ids(self, source: str) -> List[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT chunks FROM sources WHERE source = ?", (source,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def referenced_ids(self, exclude: Iterable[str] = ()) -> set:
+        """Return every chunk id referenced by sources other than the excluded ones."""
+        excluded = set(exclude)
+        ids = set()
+        with self._lock:
+            rows = self._conn.execute("SELECT source, chunks FROM sources").fetchall()
+        for source, chunks in rows:
+            if source not in excluded:
+                ids.update(json.loads(chunks))
+        return ids
+
+    def sources_under(self, directories: Iterable[str]) -> Dict[str, str]:
+        """Return {source: path} for sources loaded from files inside any of the directories."""
+        roots = [os.path.join(os.path.abspath(directory), "") for directory in directories]
+        with self._lock:
+            rows = self._conn.execute("SELECT source, path FROM sources WHERE path IS NOT NULL").fetchall()
+        return {source: path for source, path in rows if any(path.startswith(root) for root in roots)}
+
+    def missing_sources(self) -> Dict[str, str]:
+        """Return {source: path} for sources loaded from files that no longer exist."""
+        with self._lock:
+            rows = self._conn.execute("SELECT source, path FROM sources WHERE path IS NOT NULL").fetchall()
+        return {source: path for source, path in rows if not os.path.exists(path)}
+
+    def update(self, source: str, source_hash: str, chunk_ids: List[str], path: Optional[str] = None) -> None:
+        """Record the chunks now indexed for a source; `path` is where it was loaded from, if on disk."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (source, file_hash, path, chunks, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (source, source_hash, path, json.dumps(chunk_ids), time.time()),
+            )
+
+    def remove(self, source: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def existing_ids(vector_db, ids: List[str]) -> set:
+    """Return the subset of ids that already have a row in the vector table."""
+    found = set()
+    if vector_db.table is None:
+        return found
+    for start in range(0, len(ids), _ID_LOOKUP_BATCH_SIZE):
+        batch = ids[start:start + _ID_LOOKUP_BATCH_SIZE]
+        id_list = ", ".join(f"'{doc_id}'" for doc_id in batch)
+        rows = (
+            vector_db.table.search()
+            .where(f"{vector_db._id} IN ({id_list})")
+            .select([vector_db._id])
+            .limit(len(batch))
+            .to_list()
+        )
+        found.update(row[vector_db._id] for row in rows)
+    return found
+
+
+def ensure_section_column(vector_db) -> None:
+    """Add the nullable `section` column used to filter retrieval by proposal section."""
+    if vector_db.table is not None and "section" not in vector_db.table.schema.names:
+        vector_db.table.add_columns({"section": "CAST(NULL AS STRING)"})
+
+
+def delete_ids(vector_db, ids: List[str]) -> None:
+    """Delete rows from the vector table by chunk id."""
+    with table_lock(vector_db):
+        if vector_db.table is None:
+            return
+        for start in range(0, len(ids), _ID_LOOKUP_BATCH_SIZE):
+            batch = ids[start:start + _ID_LOOKUP_BATCH_SIZE]
+            id_list = ", ".join(f"'{doc_id}'" for doc_id in batch)
+            vector_db.table.delete(f"{vector_db._id} IN ({id_list})")
+
+
+def embed_in_batches(
+    embedder,
+    texts: List[str],
+    batch_size: int = 100,
+    max_workers: int = 4,
+    requests_per_minute: int = 300,
+    latencies: Optional[List[float]] = None,
+) -> List[List[float]]:
+    """Embed texts in large batches, concurrently and within a request rate limit.
+
+    If a latencies list is given, the duration of each batch request is appended to it.
+    """
+    rate_limiter = RateLimiter(requests_per_minute)
+    batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+
+    def _embed(batch: List[str]) -> List[List[float]]:
+        rate_limiter.wait()
+        started = time.perf_counter()
+        vectors = embed_batch(embedder, batch)
+        if latencies is not None:
+            latencies.append(time.perf_counter() - started)
+        return vectors
+
+    vectors: List[List[float]] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # map keeps batch order, so vectors line up with texts
+        for batch_vectors in executor.map(_embed, batches):
+            vectors.extend(batch_vectors)
+    return vectors
+
+
+def ingest_documents(
+    vector_db,
+    documents: List[Document],
+    batch_size: int = 100,
+    max_workers: int = 4,
+    requests_per_minute: int = 300,
+    latencies: Optional[List[float]] = None,
+) -> int:
+    """Embed chunks from many files in bulk and write them to LanceDB in one add.
+
+    Returns the number of new rows written.
+    """
+    refresh_table(vector_db)
+
+    # Deduplicate chunks across all files before touching the network
+    pending: Dict[str, Document] = {}
+    for document in documents:
+        doc_id = document_id(document.content)
+        if doc_id not in pending:
+            pending[doc_id] = document
+
+    for doc_id in existing_ids(vector_db, list(pending)):
+        del pending[doc_id]
+
+    if not pending:
+        logger.info("No new documents to load")
+        return 0
+
+    contents = [document.content.replace("\x00", "\ufffd") for document in pending.values()]
+    vectors = embed_in_batches(
+        vector_db.embedder,
+        contents,
+        batch_size=batch_size,
+        max_workers=max_workers,
+        requests_per_minute=requests_per_minute,
+        latencies=latencies,
+    )
+    if len(vectors) != len(contents):
+        raise ValueError(f"Got {len(vectors)} embeddings for {len(contents)} chunks; nothing was written")
+
+    rows = []
+    for (doc_id, document), content, vector in zip(pending.items(), contents, vectors):
+        if not vector:
+            logger.warning(f"Skipping chunk from {document.name}: no embedding returned")
+            continue
+        payload = {
+            "name": document.name,
+            "meta_data": document.meta_data,
+            "content": content,
+            "usage": None,
+        }
+        rows.append({
+            "id": doc_id,
+            "vector": vector,
+            "payload": json.dumps(payload),
+            "section": (document.meta_data or {}).get("section"),
+            TEXT_COLUMN: content,
+        })
+
+    if rows:
+        with table_lock(vector_db):
+            ensure_section_column(vector_db)
+            ensure_text_column(vector_db)
+            if vector_db.on_bad_vectors is not None:
+                vector_db.table.add(rows, on_bad_vectors=vector_db.on_bad_vectors, fill_value=vector_db.fill_value)
+            else:
+                vector_db.table.add(rows)
+    logger.info(f"Loaded {len(rows)} documents to knowledge base")
+    return len(rows)
+
+
+def ingest_sources(
+    vector_db,
+    sources: Dict[str, List[Document]],
+    source_hashes: Dict[str, str],
+    manifest: KnowledgeManifest,
+    maintain: bool = True,
+    source_paths: Optional[Dict[str, str]] = None,
+    **ingest_kwargs,
+) -> Dict[str, int]:
+    """Re-index changed source files, touching only the chunks that differ.
+
+    New chunks are embedded and added, chunks that no longer appear in their
+    source are deleted (unless another source still uses them), and the
+    manifest is updated. `source_paths` records where on disk each source was
+    read from, so loaders can later find files that were deleted. Bulk loaders
+    writing many batches can pass maintain=False and call
+    maintain_vector_store once at the end.
+    """
+    all_documents: List[Document] = []
+    new_chunk_ids: Dict[str, List[str]] = {}
+    for source, documents in sources.items():
+        new_chunk_ids[source] = list(dict.fromkeys(document_id(document.content) for document in documents))
+        all_documents.extend(documents)
+
+    added = ingest_documents(vector_db, all_documents, **ingest_kwargs)
+
+    # Another loader may be changing the manifest; decide what is stale and record the result in one step
+    with manifest.transaction():
+        still_referenced = manifest.referenced_ids(exclude=sources)
+        stale_ids = set()
+        for source, chunk_ids in new_chunk_ids.items():
+            current = set(chunk_ids)
+            stale_ids.update(doc_id for doc_id in manifest.chunk_ids(source) if doc_id not in current)
+            still_referenced.update(current)
+        stale_ids -= still_referenced
+        delete_ids(vector_db, sorted(stale_ids))
+
+        for source, chunk_ids in new_chunk_ids.items():
+            manifest.update(source, source_hashes[source], chunk_ids, path=(source_paths or {}).get(source))
+    if maintain:
+        maintain_vector_store(vector_db)
+    return {"added": added, "removed": len(stale_ids)}
+
+
+def remove_sources(vector_db, sources: Iterable[str], manifest: KnowledgeManifest, maintain: bool = True) -> int:
+    """Delete the chunks of sources that no longer exist (or are being replaced) and forget them."""
+    sources = [source for source in sources if source in manifest]
+    if not sources:
+        return 0
+    refresh_table(vector_db)
+
+    with manifest.transaction():
+        still_referenced = manifest.referenced_ids(exclude=sources)
+        stale_ids = set()
+        for source in sources:
+            stale_ids.update(doc_id for doc_id in manifest.chunk_ids(source) if doc_id not in still_referenced)
+            manifest.remove(source)
+        delete_ids(vector_db, sorted(stale_ids))
+    if maintain:
+        maintain_vector_store(vector_db)
+    return len(stale_ids)
@@ -0,0 +1,247 @@
+from collections import Counter
+from typing import Dict, List, Optional
+import hashlib
+import json
+import math
+import re
+from agno.knowledge import AgentKnowledge
+from agno.utils.log import logger
+from vector_index import TEXT_COLUMN, VectorIndexSettings, apply_search_settings, default_index_settings, ensure_fts_index, refresh_table
+
+# Section query vectors never change between proposals, so embed them once per process
+_section_query_vectors: Dict[str, List[float]] = {}
+
+# Retrieval modes: "vector" (dense only), "lexical" (BM25 only, no embedding calls) or "hybrid"
+SEARCH_TYPES = ("vector", "lexical", "hybrid")
+
+# Standard reciprocal-rank-fusion constant; dampens the weight of top ranks
+RRF_K = 60
+
+# Long digests make slow full-text queries without improving recall
+_MAX_QUERY_TERMS = 64
+
+# Digest terms added to a section's full-text query; BM25 sums per-term scores, so an
+# uncapped digest outvotes the few terms that say which section is being written
+_MAX_DIGEST_TERMS = 12
+
+# Words too common in proposals to rank one chunk above another
+_STOP_WORDS = frozenset(
+    "the and for with that this from are will our your their have has been into which what "
+    "when where should would could also about more other than them they these those such each".split()
+)
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    """Scale a vector to unit length."""
+    norm = math.sqrt(sum(value * value for value in vector))
+    if norm == 0:
+        return list(vector)
+    return [value / norm for value in vector]
+
+
+def _blend(digest_vector: List[float], section_vector: List[float]) -> List[float]:
+    """Combine the requirements digest and a section query into one search vector."""
+    return _normalize([d + s for d, s in zip(digest_vector, section_vector)])
+
+
+def _terms(text: str) -> List[str]:
+    return [term for term in re.findall(r"\w+", text.lower()) if len(term) > 2 and term not in _STOP_WORDS]
+
+
+def _lexical_query(section_query: str, digest: str) -> str:
+    """Build a full-text query from all of a section's terms and the digest's most frequent ones.
+
+    Returns plain terms the full-text parser accepts.
+    """
+    section_terms = list(dict.fromkeys(_terms(section_query)))
+    counts = Counter(term for term in _terms(digest) if term not in section_terms)
+    digest_terms = [term for term, _ in counts.most_common(_MAX_DIGEST_TERMS)]
+    return " ".join((section_terms + digest_terms)[:_MAX_QUERY_TERMS])
+
+
+def _has_section_tags(table) -> bool:
+    """Return True if chunks were ingested with proposal section tags."""
+    return "section" in table.schema.names
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _section_filter(section_name: str) -> str:
+    return f"section = {_quote(section_name)}"
+
+
+def _sections_filter(section_names: List[str]) -> str:
+    return f"section IN ({', '.join(_quote(name) for name in section_names)})"
+
+
+def _unique_rows(rows: List[dict], id_column: str) -> List[dict]:
+    """Drop repeated ids, keeping the first (best ranked) occurrence."""
+    seen = set()
+    unique = []
+    for row in rows:
+        if row[id_column] not in seen:
+            seen.add(row[id_column])
+            unique.append(row)
+    return unique
+
+
+def reciprocal_rank_fusion(ranked_lists: List[List[str]], k: int = RRF_K) -> List[str]:
+    """Merge several ranked id lists into one, scoring each id by sum(1 / (k + rank))."""
+    scores: Dict[str, float] = {}
+    for ranked_ids in ranked_lists:
+        for rank, doc_id in enumerate(ranked_ids, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class SectionContextRetriever:
+    """Retrieve knowledge-base examples for every proposal section in a single pass."""
+
+    def __init__(
+        self,
+        knowledge: AgentKnowledge,
+        num_documents: Optional[int] = None,
+        index_settings: VectorIndexSettings = default_index_settings,
+        search_type: str = "hybrid",
+    ):
+        """Initialize the retriever."""
+        if search_type not in SEARCH_TYPES:
+            raise ValueError(f"search_type must be one of {SEARCH_TYPES}, got '{search_type}'")
+        self.knowledge = knowledge
+        self.num_documents = num_documents or knowledge.num_documents
+        self.index_settings = index_settings
+        self.search_type = search_type
+
+    def _section_vector(self, embedder, query: str) -> List[float]:
+        """Embed a static section query, reusing the vector across proposals."""
+        key = f"{getattr(embedder, 'id', type(embedder).__name__)}:{query}"
+        if key not in _section_query_vectors:
+            _section_query_vectors[key] = _normalize(embedder.get_embedding(query))
+        return _section_query_vectors[key]
+
+    def _vector_search(self, vector_db, table, req_input: str, section_queries: Dict[str, str], limit: int) -> Dict[str, List[dict]]:
+        """Search every section in one batched query, backfilling sparse sections with a second one.
+
+        The first query sends one vector per section, prefiltered to chunks tagged
+        with any of the sections, and each vector keeps only rows of its own
+        section. Sections with too few examples are then searched together over
+        the whole library: at most two round trips per proposal.
+        """
+        section_names = list(section_queries)
+        embedder = vector_db.embedder
+        digest_vector = _normalize(embedder.get_embedding(req_input))
+        query_vectors = {
+            name: _blend(digest_vector, self._section_vector(embedder, section_queries[name]))
+            for name in section_names
+        }
+
+        results: Dict[str, List[dict]] = {name: [] for name in section_names}
+        if _has_section_tags(table):
+            vectors = [query_vectors[name] for name in section_names]
+            search = (
+                table.search(vectors if len(vectors) > 1 else vectors[0], vector_column_name=vector_db._vector_col)
+                .where(_sections_filter(section_names), prefilter=True)
+                # Each vector also matches other sections' chunks, so over-fetch before splitting by section
+                .limit(limit * len(section_names))
+            )
+            for row in apply_search_settings(search, vector_db, self.index_settings).to_list():
+                name = section_names[row.get("query_index", 0)]
+                if row.get("section") == name and len(results[name]) < limit:
+                    results[name].append(row)
+
+        # Sections with too few tagged chunks fall back to the whole library
+        sparse = [name for name in section_names if len(results[name]) < limit]
+        if sparse:
+            vectors = [query_vectors[name] for name in sparse]
+            query = vectors if len(vectors) > 1 else vectors[0]
+            search = table.search(query, vector_column_name=vector_db._vector_col).limit(limit)
+            for row in apply_search_settings(search, vector_db, self.index_settings).to_list():
+                results[sparse[row.get("query_index", 0)]].append(row)
+        return {name: _unique_rows(rows, vector_db._id) for name, rows in results.items()}
+
+    def _lexical_search(self, vector_db, table, req_input: str, section_queries: Dict[str, str], limit: int) -> Dict[str, List[dict]]:
+        """Run a local BM25 query per section; no embedding calls are made."""
+        ensure_fts_index(vector_db)
+        filter_by_section = _has_section_tags(table)
+        results: Dict[str, List[dict]] = {}
+        for name in section_queries:
+            query = _lexical_query(section_queries[name], req_input)
+            rows: List[dict] = []
+            if query and filter_by_section:
+                rows = (
+                    table.search(query, query_type="fts", fts_columns=TEXT_COLUMN)
+                    .where(_section_filter(name), prefilter=True)
+                    .select([vector_db._id, "payload"])
+                    .limit(limit)
+                    .to_list()
+                )
+            if query and len(rows) < limit:
+                rows += (
+                    table.search(query, query_type="fts", fts_columns=TEXT_COLUMN)
+                    .select([vector_db._id, "payload"])
+                    .limit(limit)
+                    .to_list()
+                )
+            results[name] = _unique_rows(rows, vector_db._id)
+        return results
+
+    def retrieve(self, req_input: str, section_queries: Dict[str, str]) -> Dict[str, str]:
+        """Return a deduplicated context block per section.
+
+        In vector and hybrid modes the requirements digest is embedded once and
+        blended with each section query. Searches are restricted to chunks tagged
+        with the section being generated, falling back to the whole library when
+        a section has too few examples. Lexical matches are fused in with
+        reciprocal rank fusion, which also catches exact terms like product names.
+        """
+        vector_db = self.knowledge.vector_db
+        if vector_db is None or not section_queries:
+            return {}
+
+        section_names = list(section_queries)
+        # Hybrid mode over-fetches so fusion has candidates from both rankings
+        limit = self.num_documents * 2 if self.search_type == "hybrid" else self.num_documents
+        try:
+            # Re-open the table so documents added since startup are visible
+            table = refresh_table(vector_db, wait=False)
+            if table is None or table.count_rows() == 0:
+                return {}
+
+            ranked: Dict[str, List[List[dict]]] = {name: [] for name in section_names}
+            if self.search_type in ("vector", "hybrid"):
+                for name, rows in self._vector_search(vector_db, table, req_input, section_queries, limit).items():
+                    ranked[name].append(rows)
+            if self.search_type in ("lexical", "hybrid"):
+                for name, rows in self._lexical_search(vector_db, table, req_input, section_queries, limit).items():
+                    ranked[name].append(rows)
+        except Exception as e:
+            logger.error(f"Error retrieving section context: {e}")
+            return {}
+
+        payloads: Dict[str, dict] = {}
+        context: Dict[str, str] = {}
+        for name in section_names:
+            for rows in ranked[name]:
+                for row in rows:
+                    # Parse each chunk once even when several sections retrieve it
+                    if row[vector_db._id] not in payloads:
+                        payloads[row[vector_db._id]] = json.loads(row["payload"])
+            fused_ids = reciprocal_rank_fusion([[row[vector_db._id] for row in rows] for rows in ranked[name]])
+
+            blocks = []
+            seen = set()
+            for doc_id in fused_ids[:self.num_documents]:
+                payload = payloads[doc_id]
+                content = payload.get("content", "").strip()
+                content_hash = hashlib.md5(content.encode()).hexdigest()
+                if not content or content_hash in seen:
+                    continue
+                seen.add(content_hash)
+
+                source = payload.get("name") or "past proposal"
+                blocks.append(f"### Example from {source}\n{content}")
+            if blocks:
+                context[name] = "\n\n".join(blocks)
+        return context
@@ -1,20 +1,23 @@
 import streamlit as st
 import os
-import tempfile
 import sys
 from typing import List
 from io import StringIO
 import importlib.util
+import uuid
 
 # Import from existing files
-from pdf_generator import create_formatted_pdf
+from document_exporters import export_docx, export_html
+from pdf_generator import clean_markdown_for_pdf
+from pdf_render_cache import PDFRenderCache
+from pdf_section_cache import SectionFlowableCache
 import sys
 sys.path.append('../proposal-creation-agent')
-from section_based_agent import SectionBasedProposalGenerator, get_agentic_rag_agent
+from section_based_agent import PROPOSAL_SECTIONS, SectionBasedProposalGenerator, get_agentic_rag_agent, proposal_markdown_parts
+from document_readers import extract_text_from_bytes, file_extension
+from ingestion_queue import IngestionQueue, get_ingestion_worker
+from knowledge_ingestion import KnowledgeManifest, default_manifest_path, file_hash, remove_sources, source_key
 from agno.document import Document
-from agno.document.reader.csv_reader import CSVReader
-from agno.document.reader.pdf_reader import PDFReader
-from agno.document.reader.text_reader import TextReader
 
 # Page config with wider layout
 st.set_page_config(
@@ -137,6 +140,14 @@ if 'pdf_generated' not in st.session_state:
     st.session_state['pdf_generated'] = False
 if 'pdf_path' not in st.session_state:
     st.session_state['pdf_path'] = None
+if 'exports' not in st.session_state:
+    # HTML and Word versions of the final proposal, exported once when the PDF is generated
+    st.session_state['exports'] = {}
+if 'export_errors' not in st.session_state:
+    st.session_state['export_errors'] = {}
+if 'pdf_section_cache' not in st.session_state:
+    # Per session: cached flowables are laid out in place, so they aren't shared between users
+    st.session_state['pdf_section_cache'] = SectionFlowableCache()
 if 'client_name' not in st.session_state:
     st.session_state['client_name'] = ""
 if 'project_name' not in st.session_state:
@@ -149,60 +160,117 @@ if 'output_dir' not in st.session_state:
     st.session_state['output_dir'] = "proposals"
 if 'uploaded_files_processed' not in st.session_state:
     st.session_state['uploaded_files_processed'] = False
+if 'ingestion_owner' not in st.session_state:
+    # Tags this session's uploads so the status panel only shows its own files
+    st.session_state['ingestion_owner'] = str(uuid.uuid4())
 if 'proposal_gen' not in st.session_state:
     st.session_state['proposal_gen'] = None
     
+@st.cache_resource
+def get_ingestion_queue() -> IngestionQueue:
+    """Share one queue connection across sessions and reruns."""
+    return IngestionQueue()
+
+@st.cache_resource
+def get_render_cache() -> PDFRenderCache:
+    """Share one PDF render cache across sessions and reruns."""
+    return PDFRenderCache()
+
 def load_documents_to_knowledge_base(uploaded_files, agent) -> bool:
-    """Load uploaded documents into the knowledge base."""
+    """Queue uploaded documents for background indexing into the knowledge base."""
     try:
-        total_chunks = 0
-        processed_files = []
+        vector_db = agent.knowledge.vector_db
+        manifest = KnowledgeManifest(default_manifest_path(vector_db))
+        ingestion_queue = get_ingestion_queue()
+        queued_files = []
+        unchanged_files = []
+        duplicate_files = []
+        unreadable_files = []
+        changed_files = []
         
+        # Hash every file first so unchanged ones are never parsed
         for uploaded_file in uploaded_files:
-            temp_path = None
+            source = source_key(uploaded_file.name)
             try:
-                # Create a temporary file
-                with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue())
-                    temp_path = tmp_file.name
-                
-                # Create Document object based on file type
-                file_extension = uploaded_file.name.lower().split('.')[-1]
-                if file_extension == 'pdf':
-                    doc_reader = PDFReader()
-                elif file_extension == 'csv':
-                    doc_reader = CSVReader()
-                elif file_extension == 'txt':
-                    doc_reader = TextReader()
-                else:
-                    continue
-                
-                documents = doc_reader.read(temp_path)
-                if documents:
-                    agent.knowledge.load_documents(documents, upsert=True)
-                    total_chunks += len(documents)
-                    processed_files.append(uploaded_file.name)
-                
-                # Clean up the temporary file
-                os.unlink(temp_path)
-                
+                file_bytes = uploaded_file.getbuffer()
             except Exception as e:
-                if temp_path and os.path.exists(temp_path):
-                    os.unlink(temp_path)
+                unreadable_files.append(f"{uploaded_file.name} ({e})")
+                continue
+            source_hash = file_hash(file_bytes)
+            if manifest.is_unchanged(source, source_hash):
+                unchanged_files.append(uploaded_file.name)
                 continue
+            changed_files.append((source, uploaded_file.name, file_bytes, source_hash))
         
-        if total_chunks > 0:
-            st.success(f"Successfully processed {len(processed_files)} files with {total_chunks} chunks added to knowledge base")
+        # Drop superseded versions before queueing the new ones, so retrieval never mixes
+        # old and new content; unchanged chunks come back from the embedding cache
+        remove_sources(vector_db, [source for source, *_ in changed_files], manifest, maintain=False)
+        manifest.close()
+        for source, file_name, file_bytes, source_hash in changed_files:
+            job_id = ingestion_queue.enqueue(source, file_name, file_bytes, source_hash, owner=st.session_state['ingestion_owner'])
+            if job_id is None:
+                duplicate_files.append(file_name)
+            else:
+                queued_files.append(file_name)
+        
+        if unchanged_files:
+            st.info(f"Skipped {len(unchanged_files)} unchanged files already in the knowledge base")
+        if duplicate_files:
+            st.info(f"Skipped {len(duplicate_files)} files already waiting to be indexed: {', '.join(duplicate_files)}")
+        if unreadable_files:
+            st.warning(f"Could not read {len(unreadable_files)} files: {', '.join(unreadable_files)}")
+        if queued_files:
+            # The worker parses, embeds and stores in the background so the wizard stays usable
+            get_ingestion_worker(vector_db, PROPOSAL_SECTIONS, ingestion_queue).notify()
+            st.success(f"Queued {len(queued_files)} files for indexing. You can continue to the next step while they are processed.")
             st.session_state['uploaded_files_processed'] = True
         return True
     except Exception as e:
         st.error(f"Error loading documents to knowledge base: {e}")
         return False
 
+@st.fragment(run_every=3)
+def show_ingestion_status(only_while_indexing: bool = False):
+    """Show indexing progress for this session's uploads, refreshing while files are being processed."""
+    ingestion_queue = get_ingestion_queue()
+    if not ingestion_queue.is_idle():
+        # Resume jobs left in the queue by a previous run of the app
+        get_ingestion_worker(st.session_state['agent'].knowledge.vector_db, PROPOSAL_SECTIONS, ingestion_queue)
+    
+    stats = ingestion_queue.stats(owner=st.session_state['ingestion_owner'])
+    counts = stats['counts']
+    total = sum(counts.values())
+    pending = counts['queued'] + counts['parsing'] + counts['embedding']
+    if not total or (only_while_indexing and not pending):
+        return
+    
+    if pending:
+        finished = counts['done'] + counts['failed']
+        st.progress(finished / total, text=f"Indexing knowledge base: {pending} files remaining")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Queued", counts['queued'])
+    col2.metric("In progress", counts['parsing'] + counts['embedding'])
+    col3.metric("Indexed", counts['done'])
+    col4.metric("Failed", counts['failed'])
+    if stats['files_per_second']:
+        st.caption(f"Throughput: {stats['files_per_second'] * 60:.1f} files/min, {stats['chunks_per_second']:.1f} chunks/s")
+    
+    with st.expander("File status"):
+        for job in ingestion_queue.jobs(limit=20, owner=st.session_state['ingestion_owner']):
+            detail = f" ({job['chunks']} chunks)" if job['chunks'] else ""
+            st.text(f"{job['file_name']}: {job['status']}{detail}")
+    if stats['failures']:
+        with st.expander(f"Failed files ({len(stats['failures'])})"):
+            for failure in stats['failures']:
+                st.text(f"{failure['file_name']}: {failure['error']}")
+
 def reset_app_state():
     """Reset all proposal-related session state variables while keeping the agent."""
     agent = st.session_state['agent']
     initialized = st.session_state['initialized']
+    if st.session_state['proposal_gen'] is not None:
+        st.session_state['proposal_gen'].release_prompt_cache()
     
     # Reset all workflow variables
     st.session_state['wizard_step'] = 1
@@ -214,6 +282,9 @@ def reset_app_state():
     st.session_state['sections_completed'] = False
     st.session_state['pdf_generated'] = False
     st.session_state['pdf_path'] = None
+    st.session_state['exports'] = {}
+    st.session_state['export_errors'] = {}
+    st.session_state['pdf_section_cache'] = SectionFlowableCache()
     st.session_state['client_name'] = ""
     st.session_state['project_name'] = ""
     st.session_state['requirements_text'] = ""
@@ -265,7 +336,15 @@ st.markdown('<h1 class="main-header">AI Proposal Generator</h1>', unsafe_allow_h
 if not st.session_state['initialized']:
     with st.spinner("Initializing AI agent..."):
         try:
-            st.session_state['agent'] = get_agentic_rag_agent()
+            # Keep the agent session id in the URL so a page reload resumes the same session row.
+            # Storage reads filter by user id too, so the user id is derived from the session id
+            # rather than drawn at random on every run. The URL is therefore a bearer token: anyone
+            # with the link can resume the session until it expires (see session_storage), so the
+            # id is a random uuid4 and links shouldn't be shared.
+            if 'session_id' not in st.query_params:
+                st.query_params['session_id'] = str(uuid.uuid4())
+            session_id = st.query_params['session_id']
+            st.session_state['agent'] = get_agentic_rag_agent(user_id=f"web-{session_id}", session_id=session_id)
             st.session_state['initialized'] = True
         except Exception as e:
             st.error(f"Error initializing AI agent: {str(e)}")
@@ -330,6 +409,8 @@ if st.session_state['initialized'] and st.session_state['wizard_step'] == 1:
         if uploaded_files and st.button("Process Files", key="process_files"):
             load_documents_to_knowledge_base(uploaded_files, st.session_state['agent'])
     
+    show_ingestion_status()
+    
     with col2:
         # Show the Next button (styled in a different color)
         if st.button("Next: Client Requirements →", key="next_to_step2", type="primary"):
@@ -342,6 +423,9 @@ elif st.session_state['initialized'] and st.session_state['wizard_step'] == 2:
     
     st.markdown('<div class="info-box">Enter information about your client and their project requirements. Be as detailed as possible to help the AI generate a tailored proposal.</div>', unsafe_allow_html=True)
     
+    # Knowledge-base files may still be indexing in the background
+    show_ingestion_status(only_while_indexing=True)
+    
     # Client Information
     col1, col2 = st.columns([1, 1])
     with col1:
@@ -375,38 +459,19 @@ elif st.session_state['initialized'] and st.session_state['wizard_step'] == 2:
         req_file = st.file_uploader("Upload requirements document", type=["txt", "pdf", "docx"], key="req_file")
         if req_file is not None:
             # Process the uploaded file
-            file_extension = req_file.name.lower().split('.')[-1]
-            
             try:
-                # Create temporary file
-                with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-                    tmp_file.write(req_file.getvalue())
-                    temp_path = tmp_file.name
-                
-                if file_extension == 'pdf':
-                    doc_reader = PDFReader()
-                    documents = doc_reader.read(temp_path)
-                    if documents:
-                        requirements_text = '\n\n'.join([doc.content for doc in documents])
-                elif file_extension == 'txt':
-                    with open(temp_path, 'r') as f:
-                        requirements_text = f.read()
-                elif file_extension == 'docx':
+                is_docx = file_extension(req_file.name) == 'docx'
+                if is_docx:
                     st.warning("DOCX support is limited. Plain text will be extracted but formatting may be lost.")
-                    try:
-                        # Simple docx text extraction
-                        import docx
-                        doc = docx.Document(temp_path)
-                        requirements_text = '\n\n'.join([para.text for para in doc.paragraphs])
-                    except Exception as e:
-                        st.error(f"Error reading DOCX file: {str(e)}")
-                        requirements_text = ""
-                else:
+                # Parse straight from the upload buffer; no temporary file round trip
+                try:
+                    requirements_text = extract_text_from_bytes(req_file.name, req_file.getbuffer())
+                except Exception as e:
+                    if not is_docx:
+                        raise
+                    st.error(f"Error reading DOCX file: {str(e)}")
                     requirements_text = ""
                 
-                # Clean up temp file
-                os.unlink(temp_path)
-                
                 # Display the extracted text and allow editing
                 requirements_text = st.text_area(
                     "Extracted Requirements (edit if needed)",
@@ -552,6 +617,8 @@ elif st.session_state['initialized'] and st.session_state['proposal_generated']
             # Move to the next section or finish
             st.session_state['section_index'] += 1
             if st.session_state['section_index'] >= len(all_sections):
+                # Every section is written; stop paying for the cached prompt prefix
+                st.session_state['proposal_gen'].release_prompt_cache()
                 st.session_state['sections_completed'] = True
                 st.session_state['wizard_step'] = 4
             else:
@@ -580,6 +647,7 @@ elif st.session_state['initialized'] and st.session_state['proposal_generated']
                         )
                         st.session_state['proposal_sections'][section_name] = section_content
             
+            st.session_state['proposal_gen'].release_prompt_cache()
             st.session_state['sections_completed'] = True
             st.session_state['wizard_step'] = 4
             st.rerun()
@@ -612,16 +680,13 @@ elif st.session_state['initialized'] and st.session_state['sections_completed']
         if st.button("Generate Final PDF", use_container_width=True, type="primary"):
             with st.spinner("Generating PDF..."):
                 try:
-                    # Convert sections to markdown format
-                    markdown_content = f"# Proposal for {st.session_state['client_name']}\n\n"
-                    if st.session_state['project_name']:
-                        markdown_content += f"## {st.session_state['project_name']}\n\n"
-                    
-                    for section_name, content in st.session_state['proposal_sections'].items():
-                        markdown_content += f"## {section_name}\n\n{content}\n\n"
-                    
-                    # Generate PDF with simplified options
-                    pdf_buffer = create_formatted_pdf(markdown_content)
+                    # Convert sections to markdown format, keeping the per-section parts for incremental rendering
+                    markdown_parts = proposal_markdown_parts(
+                        st.session_state['proposal_sections'],
+                        st.session_state['client_name'],
+                        st.session_state['project_name'],
+                    )
+                    markdown_content = "".join(markdown_parts)
                     
                     # Save the PDF to a file
                     os.makedirs(st.session_state['output_dir'], exist_ok=True)
@@ -637,8 +702,27 @@ elif st.session_state['initialized'] and st.session_state['sections_completed']
                         f"proposal_{client_part}{project_part}.pdf"
                     )
                     
-                    with open(pdf_path, 'wb') as f:
-                        f.write(pdf_buffer.getvalue())
+                    # Render straight to disk; an unchanged proposal is copied from the render cache
+                    # and an edited one only re-flows the sections that changed
+                    get_render_cache().render(
+                        markdown_content,
+                        pdf_path,
+                        markdown_parts=markdown_parts,
+                        section_cache=st.session_state['pdf_section_cache'],
+                    )
+                    
+                    # Lighter formats for pasting into an email or CRM, exported from one parse of the
+                    # proposal; each format on its own so one failing still offers the other
+                    structured_content = clean_markdown_for_pdf(markdown_content)
+                    st.session_state['exports'] = {}
+                    st.session_state['export_errors'] = {}
+                    for export_format, export in (("html", export_html), ("docx", export_docx)):
+                        try:
+                            st.session_state['exports'][export_format] = export(
+                                markdown_content, structured_content=structured_content
+                            ).getvalue()
+                        except Exception as e:
+                            st.session_state['export_errors'][export_format] = str(e)
                     
                     st.session_state['pdf_path'] = pdf_path
                     st.session_state['pdf_generated'] = True
@@ -674,6 +758,23 @@ elif st.session_state['initialized'] and st.session_state['pdf_generated']:
                 )
         except Exception as e:
             st.error(f"Error reading PDF file: {str(e)}")
+        
+        base_name = os.path.splitext(os.path.basename(st.session_state['pdf_path']))[0]
+        export_buttons = (
+            ("html", "🌐 Download as HTML", "text/html"),
+            ("docx", "📝 Download as Word", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+        )
+        for export_format, label, mime in export_buttons:
+            if export_format in st.session_state['exports']:
+                st.download_button(
+                    label=label,
+                    data=st.session_state['exports'][export_format],
+                    file_name=f"{base_name}.{export_format}",
+                    mime=mime,
+                    use_container_width=True
+                )
+            elif export_format in st.session_state['export_errors']:
+                st.error(f"Error exporting proposal as {export_format.upper()}: {st.session_state['export_errors'][export_format]}")
     
     with col2:
         # Start over button
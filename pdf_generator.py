@@ -2,26 +2,70 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowabl
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.lib.colors import black, grey, lightgrey, HexColor
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+from dataclasses import dataclass
 import io
 import re
 import os
+import tempfile
+import threading
 from datetime import datetime
 
 
+# Precompiled once; the inline passes run in this order because later ones see the tags earlier ones emit.
+# None cross a line break, so a stray marker can't pair with one in a later section (see pdf_section_cache)
+_BOLD_STARS = re.compile(r'\*\*(.+?)\*\*')
+_BOLD_UNDERSCORES = re.compile(r'__(.+?)__')
+_ITALIC_STAR = re.compile(r'\*([^*\n]+?)\*')
+_ITALIC_UNDERSCORE = re.compile(r'_([^_\n]+?)_')
+_INLINE_CODE = re.compile(r'`([^`\n]+?)`')
+
+# A header runs from 1-5 '#' to the end of its line (matching mid-line '#' too, as before)
+_HEADER = re.compile(r'(#{1,5}\s*[^\n]+)')
+_LEADING_HASHES = re.compile(r'^#+')
+_BULLET_PREFIXES = ('- ', '• ', '* ')
+_TAG = re.compile(r'<[^>]+>')
+
+# Default left + right padding of a table cell
+_TABLE_CELL_PADDING = 12
+# Narrowest column the width estimate will produce
+_MIN_COLUMN_WIDTH = 0.6*inch
+
+
+
+# Replacement callables avoid re-expanding a template string for every match
+def _wrap_bold(match):
+    return f'<b>{match[1]}</b>'
+
+
+def _wrap_italic(match):
+    return f'<i>{match[1]}</i>'
+
+
+def _wrap_code(match):
+    return f'<code>{match[1]}</code>'
+
+
 def convert_markdown_formatting(text):
     """Convert markdown formatting to ReportLab's internal formatting"""
-    # Convert bold text (both ** and __)
-    text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-    text = re.sub(r'__(.+?)__', r'<b>\1</b>', text)
+    # Each pass is skipped outright when its marker can't occur in the text
+    if '**' in text:
+        # Convert bold text (both ** and __)
+        text = _BOLD_STARS.sub(_wrap_bold, text)
+    if '__' in text:
+        text = _BOLD_UNDERSCORES.sub(_wrap_bold, text)
     
     # Convert italic text (both * and _) - using non-greedy match for better accuracy
-    text = re.sub(r'\*([^*]+?)\*', r'<i>\1</i>', text)
-    text = re.sub(r'_([^_]+?)_', r'<i>\1</i>', text)
+    if '*' in text:
+        text = _ITALIC_STAR.sub(_wrap_italic, text)
+    if '_' in text:
+        text = _ITALIC_UNDERSCORE.sub(_wrap_italic, text)
     
     # Convert inline code
-    text = re.sub(r'`([^`]+?)`', r'<code>\1</code>', text)
+    if '`' in text:
+        text = _INLINE_CODE.sub(_wrap_code, text)
     
     return text
 
@@ -58,47 +102,55 @@ def fix_html_content(text):
     return text
 
 
+def _split_sections(text):
+    """Yield (raw header, body) pairs in one scan over the header matches.
+
+    Content before the first header is dropped; text without any header is
+    treated as a single "Document" section.
+    """
+    matches = list(_HEADER.finditer(text))
+    if not matches:
+        if text.strip().startswith('#'):
+            # A lone '#' with nothing after it still counts as an (empty) header
+            yield text, ""
+        else:
+            yield "### Document", text
+        return
+    
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        yield match.group(), text[match.end():end]
+
+
 def clean_markdown_for_pdf(markdown_text):
-    """Clean and structure markdown content for PDF while preserving formatting"""
+    """Clean and structure markdown content for PDF while preserving formatting
+
+    Returns a format-neutral list of blocks, each a dict with a 'type' of
+    'header' (with a 'level'), 'paragraph', 'bullets' (a list of items) or
+    'table' (the raw markdown lines, see parse_table). Text carries inline
+    formatting as <b>, <i> and <code> tags. The PDF, HTML and DOCX exporters all
+    render from this list.
+    """
     # First convert inline formatting
     text = convert_markdown_formatting(markdown_text)
     
-    # Split into sections based on headers
-    sections = re.split(r'(#{1,5}\s*[^\n]+)', text)
-    
-    # Handle the case when there are no section headers
-    if not sections or (len(sections) == 1 and not sections[0].strip().startswith('#')):
-        # No headers found, treat the entire text as one section
-        sections = ["### Document", text]
-    else:
-        # Remove any content before the first header
-        if sections and not sections[0].strip().startswith('#'):
-            sections = sections[1:]
-    
     structured_content = []
     
-    for i in range(0, len(sections), 2):
-        if i >= len(sections):
-            break
-            
-        header = sections[i].strip('#').strip()
-        header_level = len(re.findall(r'^#+', sections[i])[0]) if re.findall(r'^#+', sections[i]) else 3
-        
-        content = sections[i + 1].strip() if i + 1 < len(sections) else ""
+    for raw_header, body in _split_sections(text):
+        header = raw_header.strip('#').strip()
+        leading_hashes = _LEADING_HASHES.match(raw_header)
+        header_level = len(leading_hashes.group()) if leading_hashes else 3
         
         # Process content into paragraphs and bullets
-        lines = content.split('\n')
         processed_paragraphs = []
         current_bullets = []
         current_table = []
-        in_table = False
-        
         current_paragraph = []
         
-        for line in lines:
+        for line in body.strip().split('\n'):
             line = line.strip()
             # Check if line is part of a table (contains |)
-            if '|' in line and (line.count('|') > 1 or line.strip().startswith('|')):
+            if '|' in line and (line.count('|') > 1 or line.startswith('|')):
                 # If we have accumulated paragraph lines, add them first
                 if current_paragraph:
                     processed_paragraphs.append(' '.join(current_paragraph))
@@ -108,73 +160,53 @@ def clean_markdown_for_pdf(markdown_text):
                 if current_bullets:
                     structured_content.append({
                         'type': 'bullets',
-                        'content': current_bullets.copy()
+                        'content': current_bullets
                     })
                     current_bullets = []
                 
                 # Add to current table
-                in_table = True
                 current_table.append(line)
-            elif line.startswith(('- ', '• ', '* ')):
+                continue
+            
+            # Any other line ends a table in progress
+            if current_table:
+                structured_content.append({
+                    'type': 'table',
+                    'content': current_table
+                })
+                current_table = []
+            
+            if line.startswith(_BULLET_PREFIXES):
                 # If we have accumulated paragraph lines, add them first
                 if current_paragraph:
                     processed_paragraphs.append(' '.join(current_paragraph))
                     current_paragraph = []
                 
-                # If we were in a table, finish it
-                if in_table and current_table:
-                    structured_content.append({
-                        'type': 'table',
-                        'content': current_table.copy()
-                    })
-                    current_table = []
-                    in_table = False
-                
-                bullet_text = line.replace('- ', '').replace('• ', '').replace('* ', '').strip()
-                current_bullets.append(bullet_text)
+                current_bullets.append(line.replace('- ', '').replace('• ', '').replace('* ', '').strip())
             elif line:
-                # If we were in a table, finish it
-                if in_table and current_table:
-                    structured_content.append({
-                        'type': 'table',
-                        'content': current_table.copy()
-                    })
-                    current_table = []
-                    in_table = False
-                
                 # If we have accumulated bullets, add them first
                 if current_bullets:
                     structured_content.append({
                         'type': 'bullets',
-                        'content': current_bullets.copy()
+                        'content': current_bullets
                     })
                     current_bullets = []
                 
                 current_paragraph.append(line)
-            else:
+            elif current_paragraph:
                 # Empty line - break paragraph
-                if current_paragraph:
-                    processed_paragraphs.append(' '.join(current_paragraph))
-                    current_paragraph = []
-                
-                # If we were in a table, an empty line signals the end
-                if in_table and current_table:
-                    structured_content.append({
-                        'type': 'table',
-                        'content': current_table.copy()
-                    })
-                    current_table = []
-                    in_table = False
+                processed_paragraphs.append(' '.join(current_paragraph))
+                current_paragraph = []
         
         # Add any remaining paragraph lines
         if current_paragraph:
             processed_paragraphs.append(' '.join(current_paragraph))
         
         # Add any remaining table
-        if in_table and current_table:
+        if current_table:
             structured_content.append({
                 'type': 'table',
-                'content': current_table.copy()
+                'content': current_table
             })
         
         # Add header
@@ -222,101 +254,341 @@ def parse_table(table_lines):
     return rows
 
 
-def create_formatted_pdf(markdown_content):
-    """Create well-formatted PDF with proper styling and formatting"""
-    buffer = io.BytesIO()
-    
-    # Document setup - standard business margins
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=0.75*inch,
-        leftMargin=0.75*inch,
-        topMargin=0.75*inch,
-        bottomMargin=0.75*inch
-    )
-    
-    styles = getSampleStyleSheet()
-    
-    # Define basic professional styles based on the example
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Title'],
-        fontName='Helvetica-Bold',
-        fontSize=20,
-        spaceAfter=20,
-        spaceBefore=12,
-        leading=24,
-        textColor=HexColor('#2980b9'),  # Blue title like in example
-        alignment=TA_LEFT  # Left-aligned like in the example
-    )
+class ReflowParagraph(Paragraph):
+    """Paragraph that keeps its line breaks when wrapped again at the same width.
+
+    Layout wraps a paragraph more than once (to measure, then to split), and
+    cached section flowables are laid out again on every render.
+    """
+
+    def wrap(self, availWidth, availHeight):
+        # Only trust lines this wrap computed: split() drops or presets blPara on the pieces it makes
+        wrapped = getattr(self, '_wrapped', None)
+        if wrapped and wrapped[0] == availWidth and wrapped[1] is getattr(self, 'blPara', None):
+            return self.width, self.height
+        size = super().wrap(availWidth, availHeight)
+        self._wrapped = (availWidth, getattr(self, 'blPara', None))
+        return size
+
+
+def estimate_column_widths(natural_widths, total_width, min_width=_MIN_COLUMN_WIDTH):
+    """Split the available width between columns according to their content.
+
+    If every column fits on one line they are stretched proportionally to fill
+    the width. Otherwise columns narrower than an equal share keep their natural
+    width and the rest is shared by the wider columns in proportion to their content.
+    """
+    widths = [max(width, min_width) for width in natural_widths]
+    if sum(widths) <= total_width:
+        scale = total_width / sum(widths)
+        return [width * scale for width in widths]
     
-    section_style = ParagraphStyle(
-        'SectionHeader',
-        parent=styles['Heading2'],
-        fontName='Helvetica-Bold',
-        fontSize=16,
-        spaceAfter=10,
-        spaceBefore=15,
-        leading=20,
-        textColor=HexColor('#2c3e50'),  # Dark blue-gray like in example
-        borderWidth=0
-    )
+    fixed = {}
+    while True:
+        remaining = total_width - sum(fixed.values())
+        flexible = [i for i in range(len(widths)) if i not in fixed]
+        share = remaining / len(flexible)
+        narrow = [i for i in flexible if widths[i] <= share]
+        if not narrow:
+            break
+        for i in narrow:
+            fixed[i] = widths[i]
     
-    subsection_style = ParagraphStyle(
-        'SubsectionHeader',
-        parent=styles['Heading3'],
-        fontName='Helvetica-Bold',
-        fontSize=13,
-        spaceAfter=8,
-        spaceBefore=10,
-        leading=16,
-        textColor=HexColor('#2c3e50')  # Dark blue-gray
-    )
+    flexible_total = sum(widths[i] for i in flexible)
+    return [fixed[i] if i in fixed else remaining * widths[i] / flexible_total for i in range(len(widths))]
+
+
+def _table_paragraph(cell, style):
+    try:
+        return ReflowParagraph(cell, style)
+    except Exception:
+        # If conversion fails, use plain text
+        return ReflowParagraph(_TAG.sub('', cell), style)
+
+
+def build_table(table_lines, styles, available_width):
+    """Build a Table from markdown table lines, or return None if there are no rows.
+
+    Cells without markup that fit on one line stay plain strings, which ReportLab
+    draws without paragraph layout; other cells become Paragraphs. The header row
+    repeats on every page the table spans.
+    """
+    rows = parse_table(table_lines)
+    if not rows:
+        return None
+    column_count = len(rows[0])
     
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['Normal'],
-        fontName='Helvetica',
-        fontSize=11,
-        spaceAfter=10,
-        spaceBefore=0,
-        leading=14,
-        alignment=TA_LEFT
-    )
+    # Measure every cell once; the widths drive both the column estimate and the plain-string check
+    measured_rows = []
+    natural_widths = [0.0] * column_count
+    for row_index, row in enumerate(rows):
+        style = styles.table_header if row_index == 0 else styles.table_cell
+        # Pad or trim ragged rows to the header's width
+        row = (row + [''] * column_count)[:column_count]
+        measured = []
+        for column, cell in enumerate(row):
+            cell = fix_html_content(cell)
+            plain = '<' not in cell and '&' not in cell
+            text_width = stringWidth(cell if plain else _TAG.sub('', cell), style.fontName, style.fontSize)
+            natural_widths[column] = max(natural_widths[column], text_width + _TABLE_CELL_PADDING)
+            measured.append((cell, plain, text_width))
+        measured_rows.append((style, measured))
     
-    bullet_style = ParagraphStyle(
-        'CustomBullet',
-        parent=styles['Normal'],
-        fontName='Helvetica',
-        fontSize=11,
-        leftIndent=20,
-        firstLineIndent=0,
-        spaceAfter=6,
-        spaceBefore=0,
-        bulletIndent=10,
-        leading=14
-    )
+    col_widths = estimate_column_widths(natural_widths, available_width)
+    data = [
+        [
+            cell if plain and text_width + _TABLE_CELL_PADDING <= col_widths[column] else _table_paragraph(cell, style)
+            for column, (cell, plain, text_width) in enumerate(measured)
+        ]
+        for style, measured in measured_rows
+    ]
     
-    # Style for footer
-    footer_style = ParagraphStyle(
-        'FooterStyle',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=grey,
-        alignment=TA_CENTER
-    )
+    table = Table(data, colWidths=col_widths, repeatRows=1)
+    table.setStyle(styles.table_style)
+    return table
+
+
+@dataclass(frozen=True)
+class PDFTheme:
+    """Fonts and colors for a rendered proposal."""
+
+    name: str
+    font: str = 'Helvetica'
+    bold_font: str = 'Helvetica-Bold'
+    title_color: str = '#2980b9'  # Blue title like in example
+    heading_color: str = '#2c3e50'  # Dark blue-gray like in example
+    table_header_background: str = '#f5f5f5'  # Light gray header
+    table_background: str = '#ffffff'
+    table_alternate_background: str = '#fafafa'
+    table_grid_color: str = '#dddddd'  # Very light grid
+
+
+THEMES = {
+    "default": PDFTheme(name="default"),
+    "corporate": PDFTheme(
+        name="corporate",
+        title_color='#1e3a8a',
+        heading_color='#1e3a8a',
+        table_header_background='#dbeafe',
+        table_alternate_background='#f1f5f9',
+        table_grid_color='#cbd5e1',
+    ),
+    "classic": PDFTheme(
+        name="classic",
+        font='Times-Roman',
+        bold_font='Times-Bold',
+        title_color='#000000',
+        heading_color='#333333',
+        table_header_background='#eeeeee',
+        table_alternate_background='#f7f7f7',
+        table_grid_color='#999999',
+    ),
+}
+
+# Themes shipped with the module; register_theme can't replace them
+BUILTIN_THEMES = frozenset(THEMES)
+
+
+class ThemeStyles:
+    """Paragraph styles and table style commands built from a theme.
+
+    Styles are only read while rendering, so one instance is shared by every PDF
+    using the theme.
+    """
+
+    def __init__(self, theme: PDFTheme):
+        self.theme = theme
+        styles = getSampleStyleSheet()
+        heading_color = HexColor(theme.heading_color)
+        
+        # Define basic professional styles based on the example
+        self.title = ParagraphStyle(
+            f'CustomTitle-{theme.name}',
+            parent=styles['Title'],
+            fontName=theme.bold_font,
+            fontSize=20,
+            spaceAfter=20,
+            spaceBefore=12,
+            leading=24,
+            textColor=HexColor(theme.title_color),
+            alignment=TA_LEFT  # Left-aligned like in the example
+        )
+        
+        self.section = ParagraphStyle(
+            f'SectionHeader-{theme.name}',
+            parent=styles['Heading2'],
+            fontName=theme.bold_font,
+            fontSize=16,
+            spaceAfter=10,
+            spaceBefore=15,
+            leading=20,
+            textColor=heading_color,
+            borderWidth=0
+        )
+        
+        self.subsection = ParagraphStyle(
+            f'SubsectionHeader-{theme.name}',
+            parent=styles['Heading3'],
+            fontName=theme.bold_font,
+            fontSize=13,
+            spaceAfter=8,
+            spaceBefore=10,
+            leading=16,
+            textColor=heading_color
+        )
+        
+        self.body = ParagraphStyle(
+            f'CustomBody-{theme.name}',
+            parent=styles['Normal'],
+            fontName=theme.font,
+            fontSize=11,
+            spaceAfter=10,
+            spaceBefore=0,
+            leading=14,
+            alignment=TA_LEFT
+        )
+        
+        self.bullet = ParagraphStyle(
+            f'CustomBullet-{theme.name}',
+            parent=styles['Normal'],
+            fontName=theme.font,
+            fontSize=11,
+            leftIndent=20,
+            firstLineIndent=0,
+            spaceAfter=6,
+            spaceBefore=0,
+            bulletIndent=10,
+            leading=14
+        )
+        
+        # Style for footer
+        self.footer = ParagraphStyle(
+            f'FooterStyle-{theme.name}',
+            parent=styles['Normal'],
+            fontName=theme.font,
+            fontSize=8,
+            textColor=grey,
+            alignment=TA_CENTER
+        )
+        
+        # Cell styles matching the table's font commands, for cells that need paragraph layout
+        self.table_header = ParagraphStyle(
+            f'TableHeader-{theme.name}',
+            parent=styles['Normal'],
+            fontName=theme.bold_font,
+            fontSize=11,
+            leading=13,
+            textColor=heading_color
+        )
+        
+        self.table_cell = ParagraphStyle(
+            f'TableCell-{theme.name}',
+            parent=styles['Normal'],
+            fontName=theme.font,
+            fontSize=10,
+            leading=12
+        )
+        
+        self.table_commands = [
+            ('BACKGROUND', (0, 0), (-1, 0), HexColor(theme.table_header_background)),
+            ('TEXTCOLOR', (0, 0), (-1, 0), heading_color),   # Dark text for header
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), theme.bold_font),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('GRID', (0, 0), (-1, -1), 0.25, HexColor(theme.table_grid_color)),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('FONTNAME', (0, 1), (-1, -1), theme.font),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+            ('TOPPADDING', (0, 1), (-1, -1), 8),
+            # One command stripes every body row, however long the table
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1),
+             [HexColor(theme.table_background), HexColor(theme.table_alternate_background)]),
+        ]
+        # Shared by every table in the theme; setStyle copies the commands into each table
+        self.table_style = TableStyle(self.table_commands)
+
+
+# Date shown in the page footer
+FOOTER_DATE_FORMAT = '%B %d, %Y'
+
+# Standard business margins, and the frame width they leave on a letter page
+PAGE_MARGIN = 0.75*inch
+FRAME_WIDTH = letter[0] - 2*PAGE_MARGIN
+
+# Built once per theme and reused by every render
+# Keyed by theme name, or by the PDFTheme itself for variants of built-in themes
+_theme_styles = {}
+_theme_styles_lock = threading.Lock()
+
+
+def register_theme(theme: PDFTheme):
+    """Add or replace a named custom theme; built-in themes can't be replaced."""
+    if theme.name in BUILTIN_THEMES:
+        raise ValueError(f"Cannot replace built-in PDF theme '{theme.name}'; register it under another name")
+    with _theme_styles_lock:
+        THEMES[theme.name] = theme
+        _theme_styles.pop(theme.name, None)
+
+
+def get_theme_styles(theme="default") -> ThemeStyles:
+    """Return the cached styles for a theme name or PDFTheme.
+
+    A PDFTheme with a new name is registered. One that reuses a built-in name
+    with different settings is styled on its own and leaves the built-in alone.
+    """
+    if isinstance(theme, PDFTheme):
+        if THEMES.get(theme.name) == theme:
+            theme = theme.name
+        elif theme.name in BUILTIN_THEMES:
+            with _theme_styles_lock:
+                if theme not in _theme_styles:
+                    _theme_styles[theme] = ThemeStyles(theme)
+                return _theme_styles[theme]
+        else:
+            register_theme(theme)
+            theme = theme.name
+    if theme not in THEMES:
+        raise ValueError(f"Unknown PDF theme '{theme}'. Available themes: {', '.join(THEMES)}")
+    with _theme_styles_lock:
+        if theme not in _theme_styles:
+            _theme_styles[theme] = ThemeStyles(THEMES[theme])
+        return _theme_styles[theme]
+
+
+def footer_date(generated_on=None):
+    """Format the footer's "Generated on" date (today by default)."""
+    return (generated_on or datetime.now()).strftime(FOOTER_DATE_FORMAT)
+
+
+def footer_text(markdown_content, generated_on=None):
+    """Build the page footer: the text of the first header and the generation date."""
+    # Only the text up to the second '#' is needed, so don't split the whole document
+    parts = markdown_content.split('#', 2)
+    title = parts[1].strip() if len(parts) > 1 else ""
+    return f"Proposal for {title} | Generated on {footer_date(generated_on)}"
+
+
+def build_flowables(structured_content, theme="default", first_header=True):
+    """Turn structured content from clean_markdown_for_pdf into ReportLab flowables.
+
+    The first header is styled as the document title unless `first_header` is
+    False, e.g. for a fragment that continues a document.
+    """
+    styles = get_theme_styles(theme)
+    title_style = styles.title
+    section_style = styles.section
+    subsection_style = styles.subsection
+    body_style = styles.body
+    bullet_style = styles.bullet
     
     elements = []
     
-    structured_content = clean_markdown_for_pdf(markdown_content)
-    
-    first_header = True
-    
     for item in structured_content:
         if item['type'] == 'header':
             if first_header:
-                elements.append(Paragraph(item['content'], title_style))
+                elements.append(ReflowParagraph(item['content'], title_style))
                 elements.append(Spacer(1, 0.1*inch))
                 first_header = False
             else:
@@ -327,7 +599,7 @@ def create_formatted_pdf(markdown_content):
                     style = subsection_style
                 
                 elements.append(Spacer(1, 0.2*inch))
-                elements.append(Paragraph(item['content'], style))
+                elements.append(ReflowParagraph(item['content'], style))
                 elements.append(Spacer(1, 0.1*inch))
         
         elif item['type'] == 'bullets':
@@ -336,7 +608,7 @@ def create_formatted_pdf(markdown_content):
                 # Fix any HTML formatting issues before creating paragraph
                 fixed_bullet = fix_html_content(bullet)
                 try:
-                    bullet_para = Paragraph(fixed_bullet, bullet_style)
+                    bullet_para = ReflowParagraph(fixed_bullet, bullet_style)
                     bullet_list.append(ListItem(
                         bullet_para,
                         leftIndent=20,
@@ -346,7 +618,7 @@ def create_formatted_pdf(markdown_content):
                     # If bullet conversion fails, try with plain text
                     print(f"Warning: Could not create bullet with formatting: {e}")
                     plain_bullet = re.sub(r'<[^>]+>', '', fixed_bullet)
-                    bullet_para = Paragraph(plain_bullet, bullet_style)
+                    bullet_para = ReflowParagraph(plain_bullet, bullet_style)
                     bullet_list.append(ListItem(
                         bullet_para,
                         leftIndent=20,
@@ -367,87 +639,132 @@ def create_formatted_pdf(markdown_content):
             # Fix any HTML formatting issues before creating paragraph
             fixed_para = fix_html_content(item['content'])
             try:
-                elements.append(Paragraph(fixed_para, body_style))
+                elements.append(ReflowParagraph(fixed_para, body_style))
             except Exception as e:
                 # If paragraph conversion fails, try with plain text
                 print(f"Warning: Could not create paragraph with formatting: {e}")
                 plain_para = re.sub(r'<[^>]+>', '', fixed_para)
-                elements.append(Paragraph(plain_para, body_style))
+                elements.append(ReflowParagraph(plain_para, body_style))
         
         elif item['type'] == 'table':
             try:
-                # Parse the table data
-                table_data = parse_table(item['content'])
+                table = build_table(item['content'], styles, FRAME_WIDTH)
                 
-                if table_data and len(table_data) > 0:
-                    # Convert all cells to Paragraphs for proper formatting
-                    formatted_data = []
-                    for row in table_data:
-                        formatted_row = []
-                        for cell in row:
-                            # Fix any HTML formatting issues
-                            fixed_cell = fix_html_content(cell)
-                            try:
-                                para_cell = Paragraph(fixed_cell, body_style)
-                                formatted_row.append(para_cell)
-                            except Exception as e:
-                                # If conversion fails, use plain text
-                                plain_cell = re.sub(r'<[^>]+>', '', fixed_cell)
-                                formatted_row.append(Paragraph(plain_cell, body_style))
-                        formatted_data.append(formatted_row)
-                    
-                    # Create the table with auto width
-                    col_widths = [doc.width/len(table_data[0])] * len(table_data[0])
-                    table = Table(formatted_data, colWidths=col_widths)
-                    
-                    # Add table style with subtle formatting
-                    table_style = TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), HexColor('#f5f5f5')),  # Light gray header
-                        ('TEXTCOLOR', (0, 0), (-1, 0), HexColor('#2c3e50')),   # Dark text for header
-                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 11),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                        ('BACKGROUND', (0, 1), (-1, -1), HexColor('#ffffff')),
-                        ('GRID', (0, 0), (-1, -1), 0.25, HexColor('#dddddd')),  # Very light grid
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                        ('FONTSIZE', (0, 1), (-1, -1), 10),
-                        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-                        ('TOPPADDING', (0, 1), (-1, -1), 8),
-                    ])
-                    
-                    # Apply alternating row colors for better readability
-                    for i in range(1, len(table_data)):
-                        if i % 2 == 0:
-                            table_style.add('BACKGROUND', (0, i), (-1, i), HexColor('#fafafa'))
-                    
-                    table.setStyle(table_style)
+                if table is not None:
                     elements.append(Spacer(1, 0.1*inch))
                     elements.append(table)
                     elements.append(Spacer(1, 0.1*inch))
             except Exception as e:
                 print(f"Warning: Could not create table: {e}")
                 # If table creation fails, add as regular text
-                elements.append(Paragraph("Table data could not be formatted properly.", body_style))
+                elements.append(ReflowParagraph("Table data could not be formatted properly.", body_style))
+    
+    return elements
+
+
+def _new_file_mode() -> int:
+    """The mode open() gives new files under the current umask."""
+    # os.umask can only be read by setting it, so restore it straight away
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Read once at import: changing the umask from a worker thread would race other threads creating files
+_NEW_FILE_MODE = _new_file_mode()
+
+
+def temp_path_beside(path) -> str:
+    """Create a uniquely named temp file in `path`'s directory, to os.replace onto `path` once written.
+
+    Unique per call, so concurrent writers of the same destination never share a temp file.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.fspath(path)) or ".", suffix=".tmp")
+    os.close(fd)
+    # mkstemp creates the file owner-only, and os.replace would keep that mode on the destination
+    os.chmod(temp_path, _NEW_FILE_MODE)
+    return temp_path
+
+
+def render_flowables(elements, footer_line, theme="default", output=None):
+    """Lay out flowables on standard pages with a `footer_line` and page numbers.
+
+    Output works as in create_formatted_pdf. The list passed in is consumed, but
+    the flowables in it can be laid out again: pass a copy of the list to render
+    them in another document.
+    """
+    if output is None:
+        target = io.BytesIO()
+    elif isinstance(output, (str, os.PathLike)):
+        # Render next to the destination and move into place so readers never see a partial file
+        target = temp_path_beside(output)
+    else:
+        target = output
+    
+    # Document setup - standard business margins
+    doc = SimpleDocTemplate(
+        target,
+        pagesize=letter,
+        rightMargin=PAGE_MARGIN,
+        leftMargin=PAGE_MARGIN,
+        topMargin=PAGE_MARGIN,
+        bottomMargin=PAGE_MARGIN
+    )
+    styles = get_theme_styles(theme)
+    
+    # The footer is the same on every page, so build and wrap it once per document
+    footer = Paragraph(footer_line, styles.footer)
+    footer.wrap(doc.width, doc.bottomMargin)
+    page_number_x = doc.width + doc.leftMargin
     
     # Create a function to add footer with client name
     def add_footer(canvas, doc):
         canvas.saveState()
-        footer_text = f"Proposal for {markdown_content.split('#')[1].strip()} | Generated on {datetime.now().strftime('%B %d, %Y')}"
-        p = Paragraph(footer_text, footer_style)
-        w, h = p.wrap(doc.width, doc.bottomMargin)
-        p.drawOn(canvas, doc.leftMargin, 0.5*inch)
+        footer.drawOn(canvas, doc.leftMargin, 0.5*inch)
         
         # Add page number
         page_num = canvas.getPageNumber()
-        canvas.setFont("Helvetica", 8)
+        canvas.setFont(styles.theme.font, 8)
         canvas.setFillColor(grey)
-        canvas.drawRightString(doc.width + doc.leftMargin, 0.5*inch, f"Page {page_num}")
+        canvas.drawRightString(page_number_x, 0.5*inch, f"Page {page_num}")
         
         canvas.restoreState()
     
+    # Layout marks flowables it has to postpone; record those edits the way multiBuild
+    # does and undo them afterwards, so the same flowables can be built again
+    edits = []
+    doc._multiBuildEdits = edits.append
+    
     # Build PDF with the footer function
-    doc.build(elements, onFirstPage=add_footer, onLaterPages=add_footer)
-    buffer.seek(0)
-    return buffer
\ No newline at end of file
+    try:
+        doc.build(elements, onFirstPage=add_footer, onLaterPages=add_footer)
+    except Exception:
+        if isinstance(target, str) and os.path.exists(target):
+            os.remove(target)
+        raise
+    finally:
+        for edit in edits:
+            edit[0](*edit[1:])
+    if output is None:
+        target.seek(0)
+        return target
+    if isinstance(output, (str, os.PathLike)):
+        os.replace(target, output)
+    return output
+
+
+def create_formatted_pdf(markdown_content, theme="default", output=None, generated_on=None, structured_content=None):
+    """Create well-formatted PDF with proper styling and formatting
+
+    By default the PDF is returned in a BytesIO. Pass a file path or any
+    writable binary stream as `output` to write the PDF there instead; the same
+    `output` is returned. Paths are written atomically. `generated_on` sets the
+    footer date (a datetime, defaulting to now). Pass `structured_content` from
+    clean_markdown_for_pdf to reuse a parse shared with other export formats.
+    """
+    if structured_content is None:
+        structured_content = clean_markdown_for_pdf(markdown_content)
+    elements = build_flowables(structured_content, theme)
+    # Footer text, including its timestamp, is computed once per document
+    return render_flowables(elements, footer_text(markdown_content, generated_on), theme, output)
+
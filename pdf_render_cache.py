@@ -0,0 +1,127 @@
+from datetime import datetime
+from typing import List, Optional
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from agno.utils.log import logger
+from pdf_generator import create_formatted_pdf, footer_date, get_theme_styles, temp_path_beside
+from pdf_section_cache import SectionFlowableCache
+
+# Cache directory location
+render_cache_dir = "data/pdf_render_cache"
+
+# Oldest PDFs are evicted once the cache grows past this size
+RENDER_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+
+def render_cache_key(markdown_content: str, theme="default", generated_on: Optional[datetime] = None) -> str:
+    """Hash everything that affects the rendered PDF: content, theme and footer."""
+    digest = hashlib.sha256()
+    # The full theme, not just its name, so re-registering a theme invalidates its PDFs
+    for part in (markdown_content, repr(get_theme_styles(theme).theme), footer_date(generated_on)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class PDFRenderCache:
+    """Size-bounded on-disk cache of rendered PDFs, so unchanged proposals aren't re-rendered."""
+
+    def __init__(self, directory: str = render_cache_dir, max_bytes: int = RENDER_CACHE_MAX_BYTES):
+        """Open (or create) the cache directory."""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached PDF path for a key, or None on a miss."""
+        path = self._path(key)
+        try:
+            # Touch on read so eviction drops the least recently used PDFs first
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key: str, pdf_path: str) -> str:
+        """Copy a rendered PDF into the cache and return its cached path."""
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(pdf_path, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+        return path
+
+    def evict(self) -> int:
+        """Delete least recently used PDFs until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".pdf"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            return removed
+
+    def render(
+        self,
+        markdown_content: str,
+        output: str,
+        theme="default",
+        generated_on: Optional[datetime] = None,
+        markdown_parts: Optional[List[str]] = None,
+        section_cache: Optional[SectionFlowableCache] = None,
+    ) -> str:
+        """Write the PDF for this content to `output`, rendering only on a cache miss.
+
+        Given the document's parts (see proposal_markdown_parts) and a section
+        cache, a miss only re-flows the sections that changed.
+        """
+        generated_on = generated_on or datetime.now()
+        key = render_cache_key(markdown_content, theme, generated_on)
+        cached = self.get(key)
+        if cached:
+            # Copied like a render is written, so readers of `output` never see a partial PDF
+            tmp_path = temp_path_beside(output)
+            try:
+                shutil.copyfile(cached, tmp_path)
+                os.replace(tmp_path, output)
+                return output
+            except FileNotFoundError:
+                # Evicted (by this or another process) between the lookup and the copy; render it again
+                pass
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        if markdown_parts and section_cache is not None:
+            section_cache.render(markdown_parts, theme=theme, output=output, generated_on=generated_on)
+        else:
+            create_formatted_pdf(markdown_content, theme=theme, output=output, generated_on=generated_on)
+        try:
+            self.put(key, output)
+        except OSError as e:
+            # The PDF itself was written; a full or read-only cache only costs the next render
+            logger.warning(f"Could not cache rendered PDF: {e}")
+        return output
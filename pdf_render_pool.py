@@ -0,0 +1,140 @@
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+import io
+import os
+import threading
+import time
+from pdf_generator import create_formatted_pdf
+
+
+@dataclass
+class RenderJob:
+    """One markdown document to render."""
+
+    name: str
+    markdown: str
+    # Write the PDF here; if None the PDF bytes are returned in the result
+    output_path: Optional[str] = None
+    theme: str = "default"
+
+
+@dataclass
+class RenderResult:
+    """Outcome of a RenderJob; exactly one of path/data is set on success, error on failure."""
+
+    name: str
+    path: Optional[str] = None
+    data: Optional[bytes] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def buffer(self) -> Optional[io.BytesIO]:
+        """The rendered PDF as a stream, for jobs rendered to memory."""
+        return io.BytesIO(self.data) if self.data is not None else None
+
+
+def render_job(job: RenderJob) -> RenderResult:
+    """Render one document, capturing any failure in the result instead of raising."""
+    started = time.perf_counter()
+    try:
+        if job.output_path:
+            directory = os.path.dirname(job.output_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            create_formatted_pdf(job.markdown, theme=job.theme, output=job.output_path)
+            return RenderResult(job.name, path=job.output_path, seconds=time.perf_counter() - started)
+        data = create_formatted_pdf(job.markdown, theme=job.theme).getvalue()
+        return RenderResult(job.name, data=data, seconds=time.perf_counter() - started)
+    except Exception as e:
+        return RenderResult(job.name, error=f"{type(e).__name__}: {e}", seconds=time.perf_counter() - started)
+
+
+class PDFRenderPool:
+    """Render PDFs across CPU cores; ReportLab layout is CPU-bound, so threads don't help.
+
+    A document that fails (or crashes its worker) only fails its own result.
+    Use as a context manager, or call close() when done.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """Start the worker processes (one per core by default)."""
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def __enter__(self) -> "PDFRenderPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def submit(self, job: RenderJob) -> "Future[RenderResult]":
+        """Queue a document and return a future for its result. Safe to call from many threads."""
+        try:
+            return self._executor.submit(render_job, job)
+        except BrokenProcessPool as e:
+            # The pool broke before this job reached it; the job is retried on its own when its result is read
+            self._replace_broken_executor()
+            future: "Future[RenderResult]" = Future()
+            future.set_exception(e)
+            return future
+
+    def render(self, job: RenderJob) -> RenderResult:
+        """Render one document on the pool and wait for it."""
+        return self._result(job, self.submit(job))
+
+    def iter_render(self, jobs: Iterable[RenderJob]) -> Iterator[RenderResult]:
+        """Render many documents, yielding results as each one finishes."""
+        futures = {self.submit(job): job for job in jobs}
+        for future in as_completed(futures):
+            yield self._result(futures[future], future)
+
+    def render_many(self, jobs: Iterable[RenderJob]) -> List[RenderResult]:
+        """Render many documents and return their results in job order."""
+        jobs = list(jobs)
+        futures = [self.submit(job) for job in jobs]
+        return [self._result(job, future) for job, future in zip(jobs, futures)]
+
+    def _replace_broken_executor(self) -> None:
+        with self._lock:
+            if getattr(self._executor, "_broken", False):
+                self._executor.shutdown(wait=False)
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def _result(self, job: RenderJob, future: "Future[RenderResult]") -> RenderResult:
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # A dying worker (e.g. out of memory) fails every document in flight; retry each
+            # one on its own so only the document that caused the crash is reported as failed
+            self._replace_broken_executor()
+            return self._render_alone(job)
+        except Exception as e:
+            return RenderResult(job.name, error=f"{type(e).__name__}: {e}")
+
+    @staticmethod
+    def _render_alone(job: RenderJob) -> RenderResult:
+        """Render a job in a process of its own, so crashing again can't fail any other document."""
+        try:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                return executor.submit(render_job, job).result()
+        except BrokenProcessPool as e:
+            return RenderResult(job.name, error=f"Render worker crashed: {e}")
+        except Exception as e:
+            return RenderResult(job.name, error=f"{type(e).__name__}: {e}")
+
+
+def render_documents(jobs: Iterable[RenderJob], max_workers: Optional[int] = None) -> List[RenderResult]:
+    """Render a batch of documents across cores and return results in job order."""
+    with PDFRenderPool(max_workers) as pool:
+        return pool.render_many(jobs)
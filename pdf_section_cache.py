@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional
+import hashlib
+import threading
+from pdf_generator import build_flowables, clean_markdown_for_pdf, footer_text, get_theme_styles, render_flowables
+
+# Most section fragments kept in memory; a proposal has about a dozen sections
+SECTION_CACHE_MAX_ENTRIES = 256
+
+
+class SectionFlowableCache:
+    """In-memory cache of the flowables built for each proposal section.
+
+    Fragments are keyed by a hash of the section markdown and theme, so when
+    one section is edited only that section is parsed, turned into flowables
+    and line-broken again. Unchanged sections keep their line breaks; only
+    page placement and drawing run over the whole document, since page breaks
+    shift with every change.
+
+    Flowables are laid out in place (render_flowables resets their layout
+    state afterwards), so keep one cache per user session rather than
+    rendering from it concurrently.
+    """
+
+    def __init__(self, max_entries: int = SECTION_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._fragments: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(markdown_part: str, theme="default", first_header: bool = False) -> str:
+        """Hash a section's markdown with everything else that affects its flowables."""
+        digest = hashlib.sha256()
+        for part in (markdown_part, repr(get_theme_styles(theme).theme), str(first_header)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def flowables(self, markdown_part: str, theme="default", first_header: bool = False) -> list:
+        """Return the cached flowables for one section, building them on a miss."""
+        key = self.key(markdown_part, theme, first_header)
+        with self._lock:
+            cached = self._fragments.get(key)
+            if cached is not None:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return cached
+        fragment = build_flowables(clean_markdown_for_pdf(markdown_part), theme, first_header)
+        with self._lock:
+            self.misses += 1
+            self._fragments[key] = fragment
+            while len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def render(self, markdown_parts: List[str], theme="default", output=None, generated_on: Optional[datetime] = None):
+        """Render a document from its title part and section parts, reusing unchanged sections.
+
+        `markdown_parts` is what proposal_markdown_parts returns; output works as
+        in create_formatted_pdf.
+        """
+        elements = []
+        for index, part in enumerate(markdown_parts):
+            # doc.build consumes the list it is given, so only copies of the cached lists are passed on
+            elements.extend(self.flowables(part, theme, first_header=index == 0))
+        return render_flowables(elements, footer_text(markdown_parts[0] if markdown_parts else "", generated_on), theme, output)
@@ -0,0 +1,116 @@
+from dataclasses import dataclass
+from typing import Optional
+import time
+from agno.models.google import Gemini
+from agno.utils.log import logger
+
+# Explicit caches are billed per hour of storage; long enough for an interactive review session
+PROMPT_CACHE_TTL_SECONDS = 1800
+PROMPT_CACHE_TTL = f"{PROMPT_CACHE_TTL_SECONDS}s"
+
+# A cache this close to expiring gets its TTL extended before another request relies on it
+PROMPT_CACHE_REFRESH_MARGIN = 300
+
+# Gemini rejects caches below a minimum token count (~1-4k depending on model); at ~4 chars per token
+# shorter prefixes aren't worth a request that will fail
+_MIN_CACHED_CHARS = 4096
+
+# Models that rejected cache creation in this process, so each proposal doesn't retry
+_unsupported_models = set()
+
+
+@dataclass
+class PromptCache:
+    """A Gemini cached content entry and when it expires (epoch seconds)."""
+
+    name: str
+    expires_at: float
+
+
+def _expires_at(cache) -> float:
+    expire_time = getattr(cache, "expire_time", None)
+    if expire_time is not None:
+        return expire_time.timestamp()
+    return time.time() + PROMPT_CACHE_TTL_SECONDS
+
+
+def create_prompt_cache(model, system_instruction: Optional[str], prefix: str) -> Optional[PromptCache]:
+    """Store a shared prompt prefix as Gemini cached content.
+
+    Returns None when the model isn't Gemini, the prefix is too short to cache
+    or the API refuses; callers then send the full prompt instead.
+    """
+    if not isinstance(model, Gemini) or model.id in _unsupported_models:
+        return None
+    if len(prefix) + len(system_instruction or "") < _MIN_CACHED_CHARS:
+        return None
+
+    from google.genai.errors import ClientError
+    from google.genai.types import CreateCachedContentConfig
+
+    try:
+        cache = model.get_client().caches.create(
+            model=model.id,
+            config=CreateCachedContentConfig(
+                system_instruction=system_instruction,
+                contents=[prefix],
+                ttl=PROMPT_CACHE_TTL,
+                display_name="proposal-prompt-prefix",
+            ),
+        )
+    except Exception as e:
+        if isinstance(e, ClientError) and (e.code == 404 or "not supported" in str(e)):
+            # Experimental models don't support caching; don't ask again for every proposal
+            _unsupported_models.add(model.id)
+        logger.warning(f"Could not create prompt cache for {model.id}, sending full prompts: {e}")
+        return None
+    return PromptCache(name=cache.name, expires_at=_expires_at(cache))
+
+
+def refresh_prompt_cache(model, cache: PromptCache) -> bool:
+    """Extend the cache's TTL if it is about to expire.
+
+    Returns False when the cache is gone (expired or deleted on the server),
+    in which case it must not be used again.
+    """
+    if cache.expires_at - time.time() > PROMPT_CACHE_REFRESH_MARGIN:
+        return True
+    if not isinstance(model, Gemini):
+        return False
+
+    from google.genai.types import UpdateCachedContentConfig
+
+    try:
+        updated = model.get_client().caches.update(
+            name=cache.name,
+            config=UpdateCachedContentConfig(ttl=PROMPT_CACHE_TTL),
+        )
+    except Exception as e:
+        logger.warning(f"Could not extend prompt cache {cache.name}: {e}")
+        return False
+    cache.expires_at = _expires_at(updated)
+    return True
+
+
+def is_prompt_cache_error(error: Exception) -> bool:
+    """Whether a failed request was rejected because its cached content expired or was deleted."""
+    from agno.exceptions import ModelProviderError
+    from google.genai.errors import ClientError
+
+    if isinstance(error, ModelProviderError):
+        status_code = error.status_code
+    elif isinstance(error, ClientError):
+        status_code = error.code
+    else:
+        return False
+    return status_code in (400, 403, 404) and "cache" in str(error).lower()
+
+
+def delete_prompt_cache(model, cache: Optional[PromptCache]) -> None:
+    """Delete cached content early instead of paying for it until the TTL expires."""
+    if cache is None or not isinstance(model, Gemini):
+        return
+    try:
+        model.get_client().caches.delete(name=cache.name)
+    except Exception as e:
+        logger.warning(f"Could not delete prompt cache {cache.name}: {e}")
@@ -0,0 +1,100 @@
+from typing import Dict, List, Optional
+import re
+from agno.document import Document
+
+# Section headers are short lines; anything longer is body text that happens to mention a section
+_MAX_HEADER_LENGTH = 80
+
+# Common alternative headings used for the standard proposal sections in past documents
+SECTION_ALIASES = {
+    "Scope/Objectives": ["Scope of Work", "Objective", "Project Scope"],
+    "Deliverables from Client": ["Client Deliverables", "Client Responsibilities"],
+    "Timelines": ["Project Timeline", "Project Plan"],
+    "Quotation": ["Pricing", "Commercials", "Cost Estimate"],
+    "About AI Planet": ["About Us"],
+}
+
+_HEADER_DECORATION = re.compile(r"^[#*_\s]*(?:(?:\d+|[ivxIVX]+)[.)]\s*)?|[*_:\s]+$")
+
+
+def _normalize_header(text: str) -> str:
+    """Reduce a header to lowercase alphanumerics, ignoring plural endings."""
+    return re.sub(r"[^a-z0-9]", "", text.lower()).rstrip("s")
+
+
+def build_section_lookup(section_names: List[str]) -> Dict[str, str]:
+    """Map normalized header variants (e.g. "Scope", "Objectives") to canonical section names."""
+    lookup: Dict[str, str] = {}
+    for name in section_names:
+        lookup[_normalize_header(name)] = name
+        for alias in name.split("/") + SECTION_ALIASES.get(name, []):
+            lookup.setdefault(_normalize_header(alias), name)
+    return lookup
+
+
+def detect_section(line: str, section_lookup: Dict[str, str]) -> Optional[str]:
+    """Return the section a header line starts, or None for ordinary lines."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > _MAX_HEADER_LENGTH:
+        return None
+    return section_lookup.get(_normalize_header(_HEADER_DECORATION.sub("", stripped)))
+
+
+def _split_span(text: str, chunk_size: int) -> List[str]:
+    """Split a section's text into pieces of at most chunk_size, breaking between lines."""
+    pieces = []
+    current: List[str] = []
+    current_length = 0
+    for line in text.split("\n"):
+        if current and current_length + len(line) + 1 > chunk_size:
+            pieces.append("\n".join(current))
+            current, current_length = [], 0
+        # A single over-long line is hard-wrapped
+        while len(line) > chunk_size:
+            pieces.append(line[:chunk_size])
+            line = line[chunk_size:]
+        current.append(line)
+        current_length += len(line) + 1
+    if current:
+        pieces.append("\n".join(current))
+    return [piece.strip() for piece in pieces if piece.strip()]
+
+
+def chunk_by_section(documents: List[Document], section_names: List[str], chunk_size: int = 5000) -> List[Document]:
+    """Chunk one source file along its proposal section headers.
+
+    The reader's documents (usually one per PDF page) are joined first so a
+    section that runs across pages keeps its tag. Each chunk gets a
+    meta_data["section"] matching one of section_names, or None for text that
+    comes before the first recognised header.
+    """
+    if not documents:
+        return []
+
+    section_lookup = build_section_lookup(section_names)
+    source_name = documents[0].name
+    spans: List[tuple] = []
+    current_section: Optional[str] = None
+    current_lines: List[str] = []
+
+    for line in "\n".join(document.content for document in documents).split("\n"):
+        section = detect_section(line, section_lookup)
+        if section is not None:
+            if current_lines:
+                spans.append((current_section, "\n".join(current_lines)))
+            current_section, current_lines = section, []
+        current_lines.append(line)
+    if current_lines:
+        spans.append((current_section, "\n".join(current_lines)))
+
+    chunks: List[Document] = []
+    for section, text in spans:
+        for piece in _split_span(text, chunk_size):
+            chunks.append(
+                Document(
+                    name=source_name,
+                    content=piece,
+                    meta_data={"section": section, "chunk": len(chunks) + 1},
+                )
+            )
+    return chunks
@@ -1,36 +1,76 @@
-from typing import Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Dict, List
+import copy
+import dataclasses
 import os
+import threading
+import time
 import uuid
 from agno.agent import Agent
+from agno.exceptions import ModelProviderError
 from agno.knowledge import AgentKnowledge
 from agno.memory.db.sqlite import SqliteMemoryDb
-from agno.storage.sqlite import SqliteStorage
 from agno.vectordb.lancedb import LanceDb  
 from agno.embedder.google import GeminiEmbedder 
 from agno.models.google import Gemini 
+from agno.utils.log import logger
+from google import genai
 import streamlit as st
+from embedding_cache import CachedEmbedder
+from knowledge_retrieval import SectionContextRetriever
+from prompt_cache import PromptCache, create_prompt_cache, delete_prompt_cache, is_prompt_cache_error, refresh_prompt_cache
+from session_storage import get_session_storage
+from vector_index import default_index_settings
 # Database file location
 db_file = "data/agent_db.sqlite" 
 # os.environ["GROQ_API_KEY"] = st.secrets.get("groq_api_key")
 os.environ["GOOGLE_API_KEY"] = st.secrets.get("google_api_key")
 
+# Gemini model used for the requirements digest and section generation
+MODEL_ID = "gemini-2.0-flash-exp"
+
+# Clients and handles that are expensive to build; created once per process and shared by every session
+_shared_resources: Dict[str, object] = {}
+# Re-entrant: building the knowledge base fetches the shared client
+_shared_resources_lock = threading.RLock()
+
+# Proposal sections in document order; also used to tag knowledge-base chunks by section
+PROPOSAL_SECTIONS = [
+    "Introduction",
+    "Scope/Objectives",
+    "Proposal/Approach",
+    "Deliverables from Client",
+    "Timelines",
+    "Quotation",
+    "About AI Planet"
+]
+
+
+def proposal_markdown_parts(proposal_sections: Dict[str, str], client_name: str, project_name: str = "") -> List[str]:
+    """Split the proposal markdown into the title block followed by one part per section."""
+    title = f"# Proposal for {client_name}\n\n"
+    if project_name:
+        title += f"## {project_name}\n\n"
+    return [title] + [f"## {section_name}\n\n{content}\n\n" for section_name, content in proposal_sections.items()]
+
+
+def proposal_to_markdown(proposal_sections: Dict[str, str], client_name: str, project_name: str = "") -> str:
+    """Assemble generated sections into the markdown document rendered to PDF."""
+    return "".join(proposal_markdown_parts(proposal_sections, client_name, project_name))
+
 
 class SectionBasedProposalGenerator:
     """Generate proposals by creating one section at a time."""
     
-    def __init__(self, agent: Agent):
-        """Initialize the proposal generator."""
+    def __init__(self, agent: Agent, search_type: str = "hybrid"):
+        """Initialize the proposal generator.
+
+        search_type selects how past proposal examples are retrieved: "vector",
+        "lexical" (local BM25, no embedding calls) or "hybrid".
+        """
 
         self.agent = agent
-        self.sections = [
-            "Introduction",
-            "Scope/Objectives",
-            "Proposal/Approach",
-            "Deliverables from Client",
-            "Timelines",
-            "Quotation",
-            "About AI Planet"
-        ]
+        self.sections = list(PROPOSAL_SECTIONS)
         self.section_descriptions = {
             "Introduction": "Create a powerful 2-3 sentence introduction that: 1) Clearly states the client's current challenge/pain point, 2) Immediately follows with AI Planet's proposed solution, and 3) Emphasizes the core business value. Use direct, professional language without technical jargon. Format: First sentence for client's need, second for our solution, optional third for key impact. Example style: 'Client X needs Y. AI Planet proposes Z solution to address this challenge.'",
             "Scope/Objectives": "Start with a clear 'Objective' statement followed by detailed 'Scope of Work' using bullet points. Focus on tangible outcomes and concrete deliverables. List specific functional areas that will be addressed by the solution.",
@@ -41,9 +81,32 @@ class SectionBasedProposalGenerator:
             "About AI Planet": "Present a concise company overview highlighting expertise in AI/ML technologies, notable clients, and relevant industry experience. Focus on credentials directly relevant to the proposed solution. Keep to 3-5 sentences or a short paragraph without excessive detail."
         }
         self.proposal_sections = {}
+        # Knowledge-base examples are retrieved once per proposal and shared by all sections
+        self.retriever = (
+            # Section-filtered examples are on topic, so fewer of them are needed per prompt
+            SectionContextRetriever(agent.knowledge, num_documents=3, search_type=search_type)
+            if agent.knowledge is not None else None
+        )
+        self.section_context: Dict[str, str] = {}
+        self.context_retrieved = False
+        # Seconds spent on the requirements digest, retrieval and each section
+        self.timings: Dict[str, float] = {}
+        # Every section (and regeneration) of a proposal reuses the same digest
+        self.requirements_digests: Dict[str, str] = {}
+        # Gemini cached content holding the shared prompt prefix, see prepare_prompt_cache
+        self.prompt_cache: Optional[PromptCache] = None
+        self.prompt_cache_prepared = False
+        # Set when the cache failed mid-proposal; the rest of the proposal then goes uncached
+        self.prompt_cache_disabled = False
+        self.cached_agent: Optional[Agent] = None
+        self.cached_req_input = ""
+        # Concurrent section workers may refresh, rebuild or drop the cache
+        self.prompt_cache_lock = threading.RLock()
     
     def get_requirements_prompt(self, requirements_text: str) -> str:
         """Create a prompt for generating a specific proposal section."""
+        if requirements_text in self.requirements_digests:
+            return self.requirements_digests[requirements_text]
         
         prompt = f""" Analyze the following client requirements and extract the key information into a concise summary.
 
@@ -60,28 +123,155 @@ Please provide:
         
         from agno.agent import Agent, RunResponse  # noqa
        
-        req_agent = Agent(model=Gemini(
-            id="gemini-2.0-flash-exp",
-            api_key=os.environ["GOOGLE_API_KEY"]
-        ), markdown=True)
+        req_agent = Agent(model=get_model(), markdown=True)
 
         req_response=req_agent.run(prompt)
         req_input=req_response.content
+        self.requirements_digests[requirements_text] = req_input
         
         return req_input
 
-    def generate_section(self, section_name: str, req_input: str) -> str:
-        """Generate content for a specific section."""
+    def retrieve_section_context(self, req_input: str) -> Dict[str, str]:
+        """Retrieve past proposal examples for all sections in one batched search."""
+        if not self.context_retrieved:
+            if self.retriever is not None:
+                started = time.perf_counter()
+                section_queries = {
+                    section: f"{section}: {self.section_descriptions.get(section, '')}"
+                    for section in self.sections
+                }
+                self.section_context = self.retriever.retrieve(req_input, section_queries)
+                self.timings["retrieval"] = time.perf_counter() - started
+            self.context_retrieved = True
+        return self.section_context
+
+    def section_request(self, section_name: str) -> str:
+        """The only part of a section prompt that changes from section to section."""
+        return f"SECTION TO WRITE: {section_name}\n{self.section_descriptions.get(section_name, '')}"
+    
+    def prepare_prompt_cache(self, req_input: str) -> None:
+        """Cache the prompt prefix shared by all sections with Gemini context caching.
+
+        The prefix holds only what every section sends: the agent's system
+        instructions and the requirements digest. Each section's retrieved
+        examples still go with that section's request. Falls back to full
+        prompts if caching isn't available.
+        """
+        with self.prompt_cache_lock:
+            if self.prompt_cache_prepared or self.prompt_cache_disabled:
+                return
+            self.prompt_cache_prepared = True
+            
+            system_message = self.agent.get_system_message(session_id=self.agent.session_id, user_id=self.agent.user_id)
+            self.prompt_cache = create_prompt_cache(
+                self.agent.model,
+                system_message.content if system_message is not None else None,
+                req_input,
+            )
+            if self.prompt_cache:
+                # The system instructions live in the cache; Gemini rejects requests that resend them
+                self.cached_agent = copy_agent(self.agent, {"system_message": None, "create_default_system_message": False})
+                self.cached_agent.model.cached_content = self.prompt_cache.name
+                self.cached_req_input = req_input
+    
+    def _drop_prompt_cache(self) -> None:
+        delete_prompt_cache(self.agent.model, self.prompt_cache)
+        self.prompt_cache = None
+        self.cached_agent = None
+        self.cached_req_input = ""
+    
+    def release_prompt_cache(self) -> None:
+        """Delete the cached prefix once the proposal no longer needs it."""
+        with self.prompt_cache_lock:
+            self._drop_prompt_cache()
+            self.prompt_cache_prepared = False
+            self.prompt_cache_disabled = False
+    
+    def disable_prompt_cache(self) -> None:
+        """Delete the cached prefix and send full prompts until the proposal is released.
+
+        Used after the cache failed, so every later section doesn't pay to create another one.
+        """
+        with self.prompt_cache_lock:
+            self._drop_prompt_cache()
+            self.prompt_cache_disabled = True
+    
+    def _cached_agent_for(self, req_input: str) -> Optional[Agent]:
+        """The agent bound to the prompt cache, if the cache covers this input and is still alive."""
+        with self.prompt_cache_lock:
+            self.prepare_prompt_cache(req_input)
+            if self.cached_agent is None or not req_input.startswith(self.cached_req_input):
+                return None
+            if not refresh_prompt_cache(self.agent.model, self.prompt_cache):
+                # Expired or deleted on the server; send full prompts for the rest of the proposal
+                self.disable_prompt_cache()
+            return self.cached_agent
+    
+    def section_input(self, section_name: str, req_input: str, cached: bool = False) -> str:
+        """Build a section prompt: digest (unless cached), the section's examples, then the section request."""
+        parts = [req_input[len(self.cached_req_input):].strip() if cached else req_input]
+        context = self.retrieve_section_context(req_input).get(section_name)
+        if context:
+            parts.append(f"PAST PROPOSAL EXAMPLES:\n{context}")
+        parts.append(self.section_request(section_name))
+        return "\n\n".join(part for part in parts if part)
+    
+    def generate_section(self, section_name: str, req_input: str, isolated: bool = False) -> str:
+        """Generate content for a specific section.
+
+        The static prefix (the requirements digest) comes first and the section's
+        examples and request last, so the prefix can be served from the cache.
+        """
         # prompt = self.get_section_prompt(section_name, requirements_text)
-        section_description = self.section_descriptions.get(section_name, "")
-        section_input=req_input+section_description
-        response = self.agent.run(section_input)
+        agent = self._cached_agent_for(req_input)
+        cached = agent is not None
+        if not cached:
+            agent = self.agent
+        
+        if isolated:
+            # Agents keep per-run state, so concurrent runs must not share one
+            agent = copy_agent(agent, {"session_id": str(uuid.uuid4())})
+        started = time.perf_counter()
+        try:
+            response = agent.run(self.section_input(section_name, req_input, cached))
+        except ModelProviderError as e:
+            if not cached or not is_prompt_cache_error(e):
+                raise
+            # The cache expired or was deleted between the refresh and the request; resend in full
+            logger.warning(f"Prompt cache unavailable for {section_name}, sending full prompts: {e}")
+            self.disable_prompt_cache()
+            agent = copy_agent(self.agent, {"session_id": str(uuid.uuid4())}) if isolated else self.agent
+            response = agent.run(self.section_input(section_name, req_input))
+        self.timings[section_name] = time.perf_counter() - started
         return response.content
     
-    def generate_all_sections(self, requirements_text: str, interactive: bool = True) -> Dict[str, str]:
-        """Generate all sections for the proposal."""
+    def generate_sections_concurrently(self, req_input: str, max_workers: int) -> Dict[str, str]:
+        """Generate all sections in parallel, each on its own copy of the agent."""
+        # Retrieve and cache once up front so worker threads only read shared state
+        self.retrieve_section_context(req_input)
+        self.prepare_prompt_cache(req_input)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            contents = executor.map(lambda section: self.generate_section(section, req_input, isolated=True), self.sections)
+            # map keeps section order
+            for section, content in zip(self.sections, contents):
+                self.proposal_sections[section] = content
+        return self.proposal_sections
+    
+    def generate_all_sections(self, requirements_text: str, interactive: bool = True, max_workers: int = 1) -> Dict[str, str]:
+        """Generate all sections for the proposal.
+
+        In non-interactive mode, max_workers > 1 generates sections concurrently.
+        """
+        started = time.perf_counter()
         req_input= self.get_requirements_prompt(requirements_text)
+        self.timings["requirements_digest"] = time.perf_counter() - started
         
+        if not interactive and max_workers > 1:
+            self.generate_sections_concurrently(req_input, max_workers)
+            self.release_prompt_cache()
+            return self.proposal_sections
+
 
         for section in self.sections:
             print(f"\nGenerating section: {section}")
@@ -123,35 +313,100 @@ Please provide:
                         print("Invalid input. Please enter 'yes', 'no', or 'edit'.")
             else:
                 self.proposal_sections[section] = content
+        self.release_prompt_cache()
         print("#"*50)
         print("length of sections:",len(self.proposal_sections))
         print("#"*50)
         return self.proposal_sections
 
 
+def _shared(name: str, factory: Callable[[], object]):
+    """Return the process-wide instance of a shared resource, building it on first use."""
+    with _shared_resources_lock:
+        if name not in _shared_resources:
+            _shared_resources[name] = factory()
+        return _shared_resources[name]
+
+
+def get_genai_client() -> genai.Client:
+    """Shared Gemini API client (one HTTP connection pool per process)."""
+    return _shared("genai_client", lambda: genai.Client(api_key=os.environ["GOOGLE_API_KEY"]))
+
+
+def get_model() -> Gemini:
+    """A Gemini model on the shared client.
+
+    Agents attach per-run tool state to their model, so each agent gets its
+    own lightweight model object rather than sharing one.
+    """
+    return Gemini(id=MODEL_ID, api_key=os.environ["GOOGLE_API_KEY"], client=get_genai_client())
+
+
+def copy_agent(agent: Agent, update: Optional[Dict[str, object]] = None) -> Agent:
+    """Copy an agent for another run, like Agent.deep_copy but without copying shared resources.
+
+    deep_copy deep-copies the knowledge base and storage, and its model copy
+    creates a new genai client. The copy gets its own model object (models
+    carry per-run state) on the same client, and the same knowledge base and
+    storage as the original.
+    """
+    values: Dict[str, object] = {}
+    for field in dataclasses.fields(agent):
+        value = getattr(agent, field.name)
+        if value is None or field.name == "agent_session":
+            continue
+        if field.name in ("knowledge", "storage"):
+            values[field.name] = value
+        elif field.name == "model":
+            model = copy.deepcopy(value)
+            # Gemini drops its client when copied, and would then open a new one on first use
+            if getattr(value, "client", None) is not None:
+                model.client = value.client
+            values[field.name] = model
+        else:
+            values[field.name] = agent._deep_copy_field(field.name, value)
+    values.update(update or {})
+    return agent.__class__(**values)
+
+
+def get_knowledge_base() -> AgentKnowledge:
+    """Shared knowledge base: one LanceDB handle and embedder per process."""
+    return _shared(
+        "knowledge_base",
+        lambda: AgentKnowledge(
+            vector_db=LanceDb(
+                uri="data/vector_store",  # Local file path for LanceDB
+                table_name="proposal_documents",
+                nprobes=default_index_settings.nprobes,
+                # Identical chunks and queries are served from the local embedding cache
+                embedder=CachedEmbedder(
+                    embedder=GeminiEmbedder(
+                        api_key=os.environ["GOOGLE_API_KEY"],
+                        gemini_client=get_genai_client(),
+                    )
+                ),
+            ),
+            num_documents=5,  # Retrieve more documents for comprehensive proposals
+        ),
+    )
+
+
 def get_agentic_rag_agent(
     user_id: Optional[str] = None,
     session_id: Optional[str] = None,
     debug_mode: bool = True,
+    search_knowledge: bool = False,
 ) -> Agent:
-    """Get an Agentic RAG Agent with Memory."""
+    """Get an Agentic RAG Agent with Memory.
+
+    Only the agent itself is built per call; the API client, knowledge base
+    and session storage are shared across the process.
+    """
     # Use Gemini as the model
-    model = Gemini(
-        id="gemini-2.0-flash-exp",
-        api_key=os.environ["GOOGLE_API_KEY"]  # Explicitly set the API key
-    )
+    model = get_model()
     
     # Define the knowledge base
-    knowledge_base = AgentKnowledge(
-        vector_db=LanceDb(
-            uri="data/vector_store",  # Local file path for LanceDB
-            table_name="proposal_documents",
-            embedder=GeminiEmbedder(
-                api_key=os.environ["GOOGLE_API_KEY"]
-            ),
-        ),
-        num_documents=5,  # Retrieve more documents for comprehensive proposals
-    )
+    knowledge_base = get_knowledge_base()
 
     # Create the Agent with proposal-specific instructions
     agent: Agent = Agent(
@@ -159,10 +414,8 @@ def get_agentic_rag_agent(
         session_id=session_id or str(uuid.uuid4()),
         user_id=user_id or str(uuid.uuid4()),
         model=model,
-        storage=SqliteStorage(
-            table_name="proposal_agent_sessions",
-            db_file=db_file
-        ),
+        # Shared, WAL-mode storage; expired sessions are pruned periodically
+        storage=get_session_storage("proposal_agent_sessions", db_file),
         knowledge=knowledge_base,
         description="You are a specialized proposal writer that creates professional, detailed proposal sections based on client requirements.",
         instructions=[
@@ -181,14 +434,15 @@ def get_agentic_rag_agent(
             "   - While matching format exactly, customize content to client's specific needs",
             "   - Reference relevant past projects when this would strengthen the proposal",
             "4. Knowledge Search:",
-            "   - Use search_knowledge_base for additional relevant examples as needed",
+            "   - Past proposal examples for the section are provided under PAST PROPOSAL EXAMPLES",
             "   - If examples are insufficient, use external search for industry specifics"
             "5. CRITICAL - Output Format:",
             "   - Start DIRECTLY with the section content with NO preamble or meta-commentary",
             "   - NO statements like 'I will generate' or explanations of your approach",
             "   - Output ONLY content that would appear in the final proposal document"
         ],
-        search_knowledge=True,
+        # Examples are pre-retrieved per proposal, so per-section tool searches are opt-in
+        search_knowledge=search_knowledge,
         markdown=True,
         show_tool_calls=True,
         debug_mode=debug_mode,
@@ -0,0 +1,83 @@
+from typing import Dict
+import threading
+import time
+from agno.storage.sqlite import SqliteStorage
+from agno.utils.log import logger
+from sqlalchemy import event, text
+
+# Sessions untouched for this long are deleted
+SESSION_TTL_SECONDS = 7 * 24 * 60 * 60
+# Prune at most this often per process
+PRUNE_INTERVAL_SECONDS = 60 * 60
+# Rebuild the file once this share of its pages is free after pruning
+VACUUM_FREE_RATIO = 0.2
+
+# One storage (and so one connection pool) per database file and table, shared by all sessions
+_storages: Dict[str, SqliteStorage] = {}
+_storages_lock = threading.Lock()
+_last_pruned: Dict[str, float] = {}
+
+
+def _configure_connection(dbapi_connection, connection_record) -> None:
+    """Per-connection settings for concurrent writers from many Streamlit threads."""
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed during a write; NORMAL sync is durable enough with WAL
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    # Wait for a competing writer instead of failing with "database is locked"
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+def get_session_storage(table_name: str, db_file: str) -> SqliteStorage:
+    """Return the shared session storage for a table, creating it once per process."""
+    key = f"{db_file}:{table_name}"
+    with _storages_lock:
+        storage = _storages.get(key)
+        if storage is None:
+            storage = SqliteStorage(table_name=table_name, db_file=db_file)
+            event.listen(storage.db_engine, "connect", _configure_connection)
+            # Drop connections opened before the listener was attached so every pooled one is configured
+            storage.db_engine.dispose()
+            _storages[key] = storage
+    maybe_prune_sessions(storage)
+    return storage
+
+
+def prune_sessions(storage: SqliteStorage, ttl_seconds: int = SESSION_TTL_SECONDS) -> int:
+    """Delete sessions not updated within the TTL and vacuum if much space was freed."""
+    if not storage.table_exists():
+        return 0
+    cutoff = int(time.time()) - ttl_seconds
+    with storage.db_engine.begin() as connection:
+        result = connection.execute(
+            text(f"DELETE FROM {storage.table_name} WHERE COALESCE(updated_at, created_at) < :cutoff"),
+            {"cutoff": cutoff},
+        )
+        deleted = result.rowcount
+    if deleted:
+        logger.info(f"Pruned {deleted} expired agent sessions from {storage.table_name}")
+        with storage.db_engine.connect() as connection:
+            page_count = connection.execute(text("PRAGMA page_count")).scalar() or 0
+            free_pages = connection.execute(text("PRAGMA freelist_count")).scalar() or 0
+        if page_count and free_pages / page_count >= VACUUM_FREE_RATIO:
+            # VACUUM can't run inside a transaction
+            with storage.db_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                connection.execute(text("VACUUM"))
+                # Fold the WAL back into the main file so the space is released on disk
+                connection.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    return deleted
+
+
+def maybe_prune_sessions(storage: SqliteStorage) -> None:
+    """Prune expired sessions if this process hasn't done so recently."""
+    key = f"{storage.db_engine.url}:{storage.table_name}"
+    now = time.time()
+    with _storages_lock:
+        if now - _last_pruned.get(key, 0.0) < PRUNE_INTERVAL_SECONDS:
+            return
+        _last_pruned[key] = now
+    try:
+        prune_sessions(storage)
+    except Exception as e:
+        logger.error(f"Error pruning agent sessions: {e}")
@@ -234,13 +234,26 @@
 # if __name__ == "__main__":
 #     main()
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import csv
+import glob
+import json
 import os
+import queue
+import re
 import sys
-from typing import List
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 
 # Import from existing files
-from pdf_generator import ProposalPDFGenerator
-from section_based_agent import SectionBasedProposalGenerator, get_agentic_rag_agent
+from pdf_generator import THEMES, create_formatted_pdf
+from pdf_render_pool import PDFRenderPool, RenderJob
+from section_based_agent import PROPOSAL_SECTIONS, SectionBasedProposalGenerator, get_agentic_rag_agent, proposal_to_markdown
+from document_readers import KNOWLEDGE_FILE_TYPES, extract_text_from_bytes, file_extension, parse_files_in_parallel
+from knowledge_ingestion import KnowledgeManifest, default_manifest_path, file_hash, ingest_sources, remove_sources, source_key
+from vector_index import maintain_vector_store
 from agno.document import Document
 from agno.document.reader.csv_reader import CSVReader
 from agno.document.reader.pdf_reader import PDFReader
@@ -251,33 +264,373 @@ from agno.utils.log import logger
 def load_documents_to_knowledge_base(document_paths: List[str], agent) -> bool:
     """Load documents into the knowledge base."""
     try:
+        vector_db = agent.knowledge.vector_db
+        manifest = KnowledgeManifest(default_manifest_path(vector_db))
+        sources = {}
+        source_hashes = {}
+        source_paths = {}
+        jobs = []
         for doc_path in document_paths:
             if not os.path.exists(doc_path):
                 print(f"Warning: Document {doc_path} does not exist, skipping.")
                 continue
-                
-            print(f"Adding {doc_path} to knowledge base...")
             
-            # Determine file type and use appropriate reader
-            if doc_path.endswith('.pdf'):
-                reader = PDFReader()
-                documents = reader.read(doc_path)
-            elif doc_path.endswith('.csv'):
-                reader = CSVReader()
-                documents = reader.read(doc_path)
+            if file_extension(doc_path) not in KNOWLEDGE_FILE_TYPES:
+                print(f"Warning: {doc_path} is not a supported file type ({', '.join(KNOWLEDGE_FILE_TYPES)}), skipping.")
+                continue
+            
+            source = source_key(doc_path)
+            if source in source_paths:
+                print(f"Warning: {doc_path} has the same file name as {source_paths[source]}, skipping.")
+                continue
+            source_paths[source] = os.path.abspath(doc_path)
+            with open(doc_path, 'rb') as f:
+                file_bytes = f.read()
+            source_hash = file_hash(file_bytes)
+            if manifest.is_unchanged(source, source_hash):
+                print(f"Skipping {doc_path}: unchanged since last indexing")
+                continue
+            
+            source_hashes[source] = source_hash
+            jobs.append((source, os.path.basename(doc_path), file_bytes))
+        
+        # Parse files in parallel processes; results arrive as each file finishes
+        for done, (source, documents, error) in enumerate(parse_files_in_parallel(jobs, PROPOSAL_SECTIONS), start=1):
+            if error or not documents:
+                print(f"[{done}/{len(jobs)}] Error reading {source}: {error or 'no content'}")
             else:
-                reader = TextReader()
-                documents = reader.read(doc_path)
-
-            if documents:
-                agent.knowledge.load_documents(documents, upsert=True)
-                print(f"Added {len(documents)} chunks from {doc_path} to knowledge base")
+                sources[source] = documents
+                print(f"[{done}/{len(jobs)}] Read {len(documents)} chunks from {source}")
+        
+        # Embed and write all changed chunks in bulk instead of file by file
+        if sources:
+            result = ingest_sources(vector_db, sources, source_hashes, manifest, source_paths=source_paths)
+            print(f"Added {result['added']} new chunks and removed {result['removed']} stale chunks")
                 
         return True
     except Exception as e:
         print(f"Error loading documents to knowledge base: {e}")
         return False
 
+def collect_knowledge_files(patterns: List[str]) -> List[str]:
+    """Expand files, directories (searched recursively) and glob patterns into supported file paths."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "**", "*"), recursive=True)
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        if not matches:
+            print(f"Warning: {pattern} matched no files, skipping.")
+        for path in matches:
+            if os.path.isfile(path) and file_extension(path) in KNOWLEDGE_FILE_TYPES:
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+def bulk_load_knowledge_base(
+    patterns: List[str],
+    agent,
+    max_workers: Optional[int] = None,
+    write_batch_chunks: int = 500,
+    remove_missing: bool = True,
+) -> bool:
+    """Load many files without prompts, embedding earlier files while later ones are still being parsed.
+
+    Files indexed from a scanned directory that this scan no longer finds are
+    removed from the knowledge base. With remove_missing, so is every source
+    loaded from a file path that no longer exists, wherever it was loaded from.
+    Uploads from the web page have no path and are never removed here.
+    """
+    files = collect_knowledge_files(patterns)
+    if not files:
+        print("No pdf, csv or txt files found.")
+    
+    vector_db = agent.knowledge.vector_db
+    manifest = KnowledgeManifest(default_manifest_path(vector_db))
+    started = time.perf_counter()
+    
+    jobs = []
+    source_hashes = {}
+    source_paths = {}
+    for path in files:
+        source = source_key(path)
+        if source in source_paths:
+            print(f"Warning: {path} has the same file name as {source_paths[source]}, skipping.")
+            continue
+        source_paths[source] = path
+        with open(path, 'rb') as f:
+            file_bytes = f.read()
+        source_hash = file_hash(file_bytes)
+        if not manifest.is_unchanged(source, source_hash):
+            source_hashes[source] = source_hash
+            jobs.append((source, os.path.basename(path), file_bytes))
+    print(f"Found {len(files)} files, {len(source_paths) - len(jobs)} unchanged since last indexing")
+    
+    # Files indexed from these directories (or, with remove_missing, from anywhere) before but deleted since
+    stale = manifest.sources_under(pattern for pattern in patterns if os.path.isdir(pattern))
+    if remove_missing:
+        stale.update(manifest.missing_sources())
+    deleted = [source for source in stale if source not in source_paths]
+    if deleted:
+        removed = remove_sources(vector_db, deleted, manifest, maintain=False)
+        print(f"Removed {len(deleted)} deleted files ({removed} chunks) from the knowledge base")
+    if not files:
+        manifest.close()
+        if deleted:
+            maintain_vector_store(vector_db)
+        return bool(deleted)
+    
+    # Parsed files flow from the process pool to a single writer thread that embeds and stores them
+    parsed = queue.Queue(maxsize=64)
+    latencies: List[float] = []
+    # Only the writer thread updates totals
+    totals = {"files": 0, "chunks": 0, "added": 0, "removed": 0, "failed": 0}
+    parse_failures = 0
+    
+    def _write(batch):
+        try:
+            result = ingest_sources(
+                vector_db,
+                batch,
+                {source: source_hashes[source] for source in batch},
+                manifest,
+                maintain=False,
+                source_paths=source_paths,
+                latencies=latencies,
+            )
+            totals["files"] += len(batch)
+            totals["chunks"] += sum(len(documents) for documents in batch.values())
+            totals["added"] += result["added"]
+            totals["removed"] += result["removed"]
+        except Exception as e:
+            # These files stay out of the manifest, so the next run retries them
+            print(f"Error writing {len(batch)} files to the knowledge base: {e}")
+            totals["failed"] += len(batch)
+    
+    def _writer():
+        batch = {}
+        batch_chunks = 0
+        while True:
+            item = parsed.get()
+            if item is None:
+                break
+            source, documents = item
+            batch[source] = documents
+            batch_chunks += len(documents)
+            if batch_chunks >= write_batch_chunks:
+                _write(batch)
+                batch, batch_chunks = {}, 0
+        if batch:
+            _write(batch)
+    
+    writer = threading.Thread(target=_writer, name="kb-writer")
+    writer.start()
+    try:
+        for done, (source, documents, error) in enumerate(parse_files_in_parallel(jobs, PROPOSAL_SECTIONS, max_workers), start=1):
+            if error or not documents:
+                print(f"[{done}/{len(jobs)}] Error reading {source}: {error or 'no content'}")
+                parse_failures += 1
+                continue
+            print(f"[{done}/{len(jobs)}] Read {len(documents)} chunks from {source}")
+            parsed.put((source, documents))
+    finally:
+        parsed.put(None)
+        writer.join()
+    
+    manifest.close()
+    if totals["files"] or deleted:
+        maintain_vector_store(vector_db)
+    
+    elapsed = time.perf_counter() - started
+    print("\nBulk load summary")
+    print(f"  Files:   {totals['files']} indexed, {len(source_paths) - len(jobs)} unchanged, {parse_failures + totals['failed']} failed")
+    print(f"  Chunks:  {totals['chunks']} ({totals['added']} new, {totals['removed']} removed)")
+    print(f"  Elapsed: {elapsed:.1f}s, {totals['files'] / elapsed:.2f} files/s, {totals['chunks'] / elapsed:.1f} chunks/s")
+    if latencies:
+        print(
+            f"  Embed latency over {len(latencies)} requests: "
+            f"p50 {_percentile(latencies, 50) * 1000:.0f}ms, "
+            f"p90 {_percentile(latencies, 90) * 1000:.0f}ms, "
+            f"p99 {_percentile(latencies, 99) * 1000:.0f}ms"
+        )
+    return parse_failures + totals["failed"] == 0
+
+# Requirement documents the batch command can read
+REQUIREMENT_FILE_TYPES = ("pdf", "txt", "docx")
+
+def load_client_metadata(path: Optional[str]) -> Dict[str, Dict[str, str]]:
+    """Read per-file client details, keyed by requirements file name.
+
+    Accepts a CSV with file, client_name and project_name columns, or a JSON
+    object mapping file names to {"client_name": ..., "project_name": ...}.
+    """
+    if not path:
+        return {}
+    if path.endswith('.json'):
+        with open(path, 'r') as f:
+            return {os.path.basename(name): details for name, details in json.load(f).items()}
+    with open(path, 'r', newline='') as f:
+        return {os.path.basename(row['file']): row for row in csv.DictReader(f)}
+
+# Anything but letters, digits, '.', '_' and '-' is replaced in output file names
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^a-z0-9._-]+')
+
+def client_details(requirements_path: str, metadata: Dict[str, str]) -> Tuple[str, str]:
+    """Client and project name for a requirements file, from its metadata or its file name."""
+    file_name = os.path.basename(requirements_path)
+    # Fall back to the file name when no client name is given, e.g. acme_corp.pdf -> Acme Corp
+    client_name = metadata.get('client_name') or os.path.splitext(file_name)[0].replace('_', ' ').title()
+    project_name = metadata.get('project_name') or ""
+    return client_name, project_name
+
+def proposal_pdf_name(requirements_path: str, client_name: str, project_name: str = "") -> str:
+    """Output file name: requirements file stem, client and project, with path separators and the like removed."""
+    stem = os.path.splitext(os.path.basename(requirements_path))[0]
+    parts = [_UNSAFE_FILENAME_CHARS.sub('_', part.lower()).strip('._') for part in (stem, client_name, project_name)]
+    return "proposal_" + "_".join(part for part in parts if part) + ".pdf"
+
+def unique_output_paths(requirement_files: List[str], metadata: Dict[str, Dict[str, str]], output_dir: str) -> Dict[str, str]:
+    """Assign each requirements file its PDF path, suffixing names that would collide (_2, _3, ...)."""
+    paths = {}
+    taken = set()
+    for requirements_path in requirement_files:
+        name = proposal_pdf_name(requirements_path, *client_details(requirements_path, metadata.get(os.path.basename(requirements_path), {})))
+        stem, extension = os.path.splitext(name)
+        candidate, suffix = name, 2
+        while candidate in taken:
+            candidate, suffix = f"{stem}_{suffix}{extension}", suffix + 1
+        taken.add(candidate)
+        paths[requirements_path] = os.path.join(output_dir, candidate)
+    return paths
+
+def generate_proposal_for_file(
+    requirements_path: str,
+    metadata: Dict[str, str],
+    output_dir: str,
+    section_workers: int,
+    theme: str = "default",
+    render_pool: Optional[PDFRenderPool] = None,
+    pdf_path: Optional[str] = None,
+) -> dict:
+    """Generate and render one proposal without prompts, returning its report entry.
+
+    Batch runs pass `pdf_path` from unique_output_paths so proposals never overwrite each other.
+    """
+    started = time.perf_counter()
+    file_name = os.path.basename(requirements_path)
+    client_name, project_name = client_details(requirements_path, metadata)
+    report = {
+        "file": requirements_path,
+        "client_name": client_name,
+        "project_name": project_name,
+        "status": "ok",
+        "error": None,
+        "pdf_path": None,
+        "timings": {},
+    }
+    try:
+        with open(requirements_path, 'rb') as f:
+            requirements_text = extract_text_from_bytes(file_name, f.read())
+        if not requirements_text.strip():
+            raise ValueError("no requirements text could be read")
+        
+        agent = get_agentic_rag_agent(debug_mode=False)
+        proposal_gen = SectionBasedProposalGenerator(agent)
+        proposal_sections = proposal_gen.generate_all_sections(
+            requirements_text=requirements_text,
+            interactive=False,
+            max_workers=section_workers,
+        )
+        report["timings"].update(proposal_gen.timings)
+        
+        pdf_started = time.perf_counter()
+        pdf_path = pdf_path or os.path.join(output_dir, proposal_pdf_name(requirements_path, client_name, project_name))
+        markdown_content = proposal_to_markdown(proposal_sections, client_name, project_name)
+        if render_pool is not None:
+            # Layout is CPU-bound, so render in a worker process instead of this thread
+            result = render_pool.render(RenderJob(file_name, markdown_content, output_path=pdf_path, theme=theme))
+            if not result.ok:
+                raise RuntimeError(f"PDF rendering failed: {result.error}")
+        else:
+            create_formatted_pdf(markdown_content, theme=theme, output=pdf_path)
+        report["timings"]["pdf"] = time.perf_counter() - pdf_started
+        report["pdf_path"] = pdf_path
+    except Exception as e:
+        report["status"] = "failed"
+        report["error"] = str(e)
+    report["timings"]["total"] = time.perf_counter() - started
+    return report
+
+def batch_generate_proposals(
+    requirements_dir: str,
+    output_dir: str,
+    metadata_path: Optional[str] = None,
+    proposal_workers: int = 2,
+    section_workers: int = 3,
+    theme: str = "default",
+) -> bool:
+    """Draft a proposal for every requirements file in a folder and write a run report."""
+    requirement_files = sorted(
+        os.path.join(requirements_dir, name)
+        for name in os.listdir(requirements_dir)
+        if file_extension(name) in REQUIREMENT_FILE_TYPES
+    )
+    if not requirement_files:
+        print(f"No pdf, txt or docx requirement files found in {requirements_dir}")
+        return False
+    
+    metadata = load_client_metadata(metadata_path)
+    os.makedirs(output_dir, exist_ok=True)
+    output_paths = unique_output_paths(requirement_files, metadata, output_dir)
+    started = time.perf_counter()
+    print(f"Generating {len(requirement_files)} proposals ({proposal_workers} at a time, {section_workers} sections each)...")
+    
+    reports = []
+    # At most proposal_workers * section_workers model calls are in flight at once
+    with ThreadPoolExecutor(max_workers=proposal_workers) as executor, PDFRenderPool(max_workers=proposal_workers) as render_pool:
+        futures = [
+            executor.submit(
+                generate_proposal_for_file,
+                path,
+                metadata.get(os.path.basename(path), {}),
+                output_dir,
+                section_workers,
+                theme,
+                render_pool,
+                output_paths[path],
+            )
+            for path in requirement_files
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            report = future.result()
+            reports.append(report)
+            outcome = report["pdf_path"] if report["status"] == "ok" else f"FAILED: {report['error']}"
+            print(f"[{done}/{len(requirement_files)}] {report['file']} ({report['timings']['total']:.1f}s) -> {outcome}")
+    
+    elapsed = time.perf_counter() - started
+    succeeded = sum(1 for report in reports if report["status"] == "ok")
+    run_report = {
+        "requirements_dir": requirements_dir,
+        "proposal_workers": proposal_workers,
+        "section_workers": section_workers,
+        "proposals": len(reports),
+        "succeeded": succeeded,
+        "failed": len(reports) - succeeded,
+        "elapsed_seconds": elapsed,
+        "results": sorted(reports, key=lambda report: report["file"]),
+    }
+    report_path = os.path.join(output_dir, "batch_report.json")
+    with open(report_path, 'w') as f:
+        json.dump(run_report, f, indent=2)
+    
+    print(f"\n{succeeded}/{len(reports)} proposals generated in {elapsed:.1f}s. Run report: {report_path}")
+    return succeeded == len(reports)
+
 def main():
     print("=" * 50)
     print("AI Proposal Generator")
@@ -347,9 +700,6 @@ def main():
     )
     print(proposal_sections)
     
-    # Step 9: Initialize the PDF generator
-    pdf_gen = ProposalPDFGenerator(output_dir=output_dir)
-    
     # Step 10: Generate PDF
     # try:
     #     print("\nGenerating PDF...")
@@ -369,5 +719,46 @@ def main():
     
     # print(f"\nProposal PDF generated successfully: {pdf_path}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI Proposal Generator")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    load_kb = subparsers.add_parser("load-kb", help="Bulk load files into the knowledge base without prompts")
+    load_kb.add_argument("paths", nargs="+", help="Files, directories (searched recursively) or glob patterns")
+    load_kb.add_argument("--workers", type=int, default=None, help="Processes used for parsing (default: CPU count)")
+    load_kb.add_argument("--write-batch", type=int, default=500, help="Chunks embedded and written per batch")
+    load_kb.add_argument("--keep-missing", action="store_true",
+                         help="Keep knowledge-base entries for previously loaded files that no longer exist on disk")
+    
+    batch = subparsers.add_parser("batch", help="Draft a proposal for every requirements file in a folder")
+    batch.add_argument("requirements_dir", help="Folder of pdf, txt or docx requirement files")
+    batch.add_argument("--metadata", default=None, help="CSV (file, client_name, project_name) or JSON with client details per file")
+    batch.add_argument("--output-dir", default="proposals", help="Where PDFs and batch_report.json are written")
+    batch.add_argument("--proposal-workers", type=int, default=2, help="Proposals generated at the same time")
+    batch.add_argument("--section-workers", type=int, default=3, help="Sections generated at the same time per proposal")
+    batch.add_argument("--theme", default="default", choices=sorted(THEMES), help="PDF theme")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.command == "load-kb":
+        os.makedirs("data", exist_ok=True)
+        agent = get_agentic_rag_agent()
+        if not bulk_load_knowledge_base(
+            args.paths, agent, max_workers=args.workers, write_batch_chunks=args.write_batch,
+            remove_missing=not args.keep_missing,
+        ):
+            sys.exit(1)
+    elif args.command == "batch":
+        os.makedirs("data", exist_ok=True)
+        if not batch_generate_proposals(
+            args.requirements_dir,
+            args.output_dir,
+            metadata_path=args.metadata,
+            proposal_workers=args.proposal_workers,
+            section_workers=args.section_workers,
+            theme=args.theme,
+        ):
+            sys.exit(1)
+    else:
+        main()
@@ -0,0 +1,84 @@
+import io
+import os
+import pytest
+from document_exporters import export_document, export_docx, export_html, inline_runs, structured_content_to_html
+
+CONTENT = [
+    {'type': 'header', 'content': 'Proposal for <b>Acme</b>', 'level': 1},
+    {'type': 'header', 'content': 'Scope', 'level': 2},
+    {'type': 'paragraph', 'content': 'We <b>build</b> <i>fast</i> & <code>safe</code> <tools>.'},
+    {'type': 'header', 'content': 'Details', 'level': 3},
+    {'type': 'bullets', 'content': ['one <b>b</b>', 'two']},
+    {'type': 'table', 'content': ['| Item | Cost |', '|---|---|', '| Build & test | $10 |']},
+]
+
+
+def test_inline_runs_track_nested_formatting():
+    runs = list(inline_runs('a <b>b <i>c</i></b> <code>d</code>'))
+
+    assert runs == [
+        ('a ', False, False, False),
+        ('b ', True, False, False),
+        ('c', True, True, False),
+        (' ', False, False, False),
+        ('d', False, False, True),
+    ]
+
+
+def test_inline_runs_ignore_stray_closing_tags():
+    runs = list(inline_runs('x</b> <b>y</b>'))
+
+    assert runs == [('x', False, False, False), (' ', False, False, False), ('y', True, False, False)]
+
+
+def test_html_maps_headers_like_the_pdf_and_escapes_text():
+    body = structured_content_to_html(CONTENT).split('<body>', 1)[1]
+
+    assert '<h1>Proposal for <strong>Acme</strong></h1>' in body
+    assert '<h2>Scope</h2>' in body
+    assert '<h3>Details</h3>' in body
+    assert '<p>We <strong>build</strong> <em>fast</em> &amp; <code>safe</code> &lt;tools&gt;.</p>' in body
+    assert '<ul><li>one <strong>b</strong></li><li>two</li></ul>' in body
+    assert '<thead><tr><th>Item</th><th>Cost</th></tr></thead>' in body
+    assert '<td>Build &amp; test</td><td>$10</td>' in body
+
+
+def test_docx_keeps_structure_and_formatting():
+    docx = pytest.importorskip("docx")
+    document = docx.Document(export_docx('', structured_content=CONTENT))
+
+    paragraphs = [(p.style.name, p.text) for p in document.paragraphs]
+    assert paragraphs[:3] == [('Title', 'Proposal for Acme'), ('Heading 1', 'Scope'), ('Normal', 'We build fast & safe <tools>.')]
+    assert ('List Bullet', 'one b') in paragraphs
+    assert [run.text for run in document.paragraphs[2].runs if run.bold] == ['build']
+    table = document.tables[0]
+    assert [[cell.text for cell in row.cells] for row in table.rows] == [['Item', 'Cost'], ['Build & test', '$10']]
+
+
+def test_export_to_path_replaces_the_file_without_leftovers(tmp_path):
+    path = tmp_path / "proposal.html"
+    path.write_text("old")
+
+    assert export_html('', str(path), structured_content=CONTENT) == str(path)
+    assert path.read_text(encoding="utf-8").startswith("<!DOCTYPE html>")
+    assert os.listdir(tmp_path) == ["proposal.html"]
+
+
+def test_export_to_stream():
+    stream = io.BytesIO()
+
+    assert export_html('', stream, structured_content=CONTENT) is stream
+    assert b'<h2>Scope</h2>' in stream.getvalue()
+
+
+def test_export_document_shares_one_parse():
+    exports = export_document("# Title\n\n## Scope\n\nText.\n", formats=["html", "pdf"])
+
+    assert set(exports) == {"html", "pdf"}
+    assert exports["pdf"].getvalue().startswith(b"%PDF")
+    assert b'<h2>Scope</h2>' in exports["html"].getvalue()
+
+
+def test_export_document_rejects_unknown_formats():
+    with pytest.raises(ValueError, match="odt"):
+        export_document("# Title\n", formats=["html", "odt"])
@@ -0,0 +1,37 @@
+import pytest
+from document_readers import parse_files_in_parallel, read_document_bytes
+
+SECTIONS = ["Introduction", "Timelines"]
+
+
+def test_reads_text_files_from_memory():
+    documents = read_document_bytes("past.txt", memoryview(b"Introduction\nWe help Acme."))
+
+    assert "We help Acme." in documents[0].content
+
+
+def test_corrupt_files_are_errors_not_empty_files():
+    # The PDF reader logs the parse failure and returns no documents
+    with pytest.raises(ValueError, match="No content could be read from broken.pdf"):
+        read_document_bytes("broken.pdf", b"%PDF-1.4 this is not really a pdf")
+
+
+def test_unsupported_file_types_are_rejected():
+    with pytest.raises(ValueError, match="Unsupported file type for notes.md"):
+        read_document_bytes("notes.md", b"# Notes")
+
+
+def test_parse_failures_are_reported_per_file():
+    jobs = [
+        ("good", "good.txt", b"Introduction\nWe help Acme.\nTimelines\nTwo weeks."),
+        ("broken", "broken.pdf", b"not a pdf"),
+        ("notes", "notes.md", b"# Notes"),
+    ]
+
+    results = {source: (documents, error) for source, documents, error in parse_files_in_parallel(jobs, SECTIONS, max_workers=1)}
+
+    documents, error = results["good"]
+    assert error is None
+    assert [document.meta_data["section"] for document in documents] == ["Introduction", "Timelines"]
+    assert results["broken"][0] is None and "No content could be read" in results["broken"][1]
+    assert results["notes"][0] is None and "Unsupported file type" in results["notes"][1]
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+import itertools
+import pytest
+from agno.embedder.base import Embedder
+from agno.embedder.google import GeminiEmbedder
+import embedding_cache
+from embedding_cache import CachedEmbedder, EmbeddingCache, content_hash, embed_batch
+
+
+class CountingEmbedder(Embedder):
+    """Embeds text as [len(text)] and counts the texts it was asked for."""
+
+    calls: int = 0
+
+    def get_embedding(self, text):
+        self.calls += 1
+        return [float(len(text))]
+
+
+def _tick(monkeypatch):
+    """Give every cache operation its own timestamp so LRU order is deterministic."""
+    clock = itertools.count(1000)
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: float(next(clock)))
+
+
+def test_eviction_drops_least_recently_used(tmp_path, monkeypatch):
+    _tick(monkeypatch)
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_entries=10)
+    for i in range(10):
+        cache.put_many("m", {f"k{i}": [float(i)]})
+    # Reading k0 and k1 makes them the most recently used
+    assert set(cache.get_many("m", ["k0", "k1"])) == {"k0", "k1"}
+
+    cache.put_many("m", {"k10": [10.0]})
+
+    remaining = cache.get_many("m", [f"k{i}" for i in range(11)])
+    # 11 entries exceed max_entries, so the cache shrinks to 90% (9) by dropping the two oldest
+    assert len(remaining) == 9
+    assert {"k0", "k1", "k10"} <= set(remaining)
+    assert "k2" not in remaining and "k3" not in remaining
+
+
+def test_eviction_is_a_no_op_under_the_limit(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_entries=10)
+    cache.put_many("m", {f"k{i}": [float(i)] for i in range(5)})
+    assert cache.evict() == 0
+    assert len(cache.get_many("m", [f"k{i}" for i in range(5)])) == 5
+
+
+def test_cached_embedder_only_embeds_misses(tmp_path):
+    inner = CountingEmbedder(dimensions=1)
+    embedder = CachedEmbedder(embedder=inner, cache=EmbeddingCache(str(tmp_path / "cache.sqlite")))
+
+    assert embedder.get_embeddings(["a", "bb", "a"]) == [[1.0], [2.0], [1.0]]
+    assert inner.calls == 2
+    assert embedder.get_embeddings(["bb", "ccc"]) == [[2.0], [3.0]]
+    assert inner.calls == 3
+    assert content_hash("a") in embedder.cache.get_many(embedder.model_key, [content_hash("a")])
+
+
+
+class _ShortBatchModels:
+    """Stands in for the Gemini models API, answering a batch with one vector too few."""
+
+    def embed_content(self, model, contents, **kwargs):
+        return SimpleNamespace(embeddings=[SimpleNamespace(values=[1.0]) for _ in contents[:-1]])
+
+
+def test_embed_batch_rejects_short_responses(tmp_path):
+    embedder = GeminiEmbedder(api_key="test", gemini_client=SimpleNamespace(models=_ShortBatchModels()))
+    with pytest.raises(ValueError, match="2 vectors for 3 texts"):
+        embed_batch(embedder, ["a", "b", "c"])
+
+    # Nothing is cached under the wrong text when the count is off
+    cached = CachedEmbedder(embedder=embedder, cache=EmbeddingCache(str(tmp_path / "cache.sqlite")))
+    with pytest.raises(ValueError):
+        cached.get_embeddings(["a", "b", "c"])
+    assert cached.cache.get_many(cached.model_key, [content_hash(text) for text in "abc"]) == {}
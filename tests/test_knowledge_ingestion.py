@@ -0,0 +1,95 @@
+import json
+import pytest
+from knowledge_ingestion import KnowledgeManifest, source_key
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = KnowledgeManifest(str(tmp_path / "kb_manifest.sqlite"))
+    yield manifest
+    manifest.close()
+
+
+def test_tracks_file_hashes_and_chunks(manifest):
+    manifest.update("a.pdf", "hash-1", ["c1", "c2"])
+
+    assert "a.pdf" in manifest
+    assert manifest.is_unchanged("a.pdf", "hash-1")
+    assert not manifest.is_unchanged("a.pdf", "hash-2")
+    assert not manifest.is_unchanged("b.pdf", "hash-1")
+    assert manifest.chunk_ids("a.pdf") == ["c1", "c2"]
+    assert manifest.chunk_ids("b.pdf") == []
+
+
+def test_referenced_ids_excludes_sources(manifest):
+    manifest.update("a.pdf", "h", ["shared", "only-a"])
+    manifest.update("b.pdf", "h", ["shared", "only-b"])
+
+    assert manifest.referenced_ids() == {"shared", "only-a", "only-b"}
+    # A chunk another source still uses stays referenced
+    assert manifest.referenced_ids(exclude=["a.pdf"]) == {"shared", "only-b"}
+
+
+def test_entries_persist_and_are_shared_between_instances(manifest, tmp_path):
+    manifest.update("a.pdf", "h", ["c1"])
+    other = KnowledgeManifest(manifest.path)
+    other.update("b.pdf", "h", ["c2"])
+
+    # Each writer's entry survives the other's write
+    assert manifest.referenced_ids() == {"c1", "c2"}
+    other.remove("a.pdf")
+    assert "a.pdf" not in manifest
+    other.close()
+
+
+def test_transaction_rolls_back_on_error(manifest):
+    manifest.update("a.pdf", "h", ["c1"])
+    with pytest.raises(RuntimeError):
+        with manifest.transaction():
+            manifest.remove("a.pdf")
+            manifest.update("b.pdf", "h", ["c2"])
+            raise RuntimeError("delete failed")
+
+    assert "a.pdf" in manifest
+    assert "b.pdf" not in manifest
+
+
+def test_sources_under_matches_recorded_paths(manifest, tmp_path):
+    docs = tmp_path / "docs"
+    manifest.update("a.pdf", "h", [], path=str(docs / "a.pdf"))
+    manifest.update("b.pdf", "h", [], path=str(tmp_path / "docs-old" / "b.pdf"))
+    manifest.update("upload.pdf", "h", [])
+
+    # A sibling directory sharing the prefix doesn't count as inside it
+    assert manifest.sources_under([str(docs)]) == {"a.pdf": str(docs / "a.pdf")}
+
+
+def test_missing_sources_are_recorded_paths_that_no_longer_exist(manifest, tmp_path):
+    kept = tmp_path / "kept.pdf"
+    kept.write_bytes(b"%PDF")
+    manifest.update("kept.pdf", "h", [], path=str(kept))
+    manifest.update("gone.pdf", "h", [], path=str(tmp_path / "gone.pdf"))
+    manifest.update("upload.pdf", "h", [])
+
+    assert manifest.missing_sources() == {"gone.pdf": str(tmp_path / "gone.pdf")}
+
+
+def test_imports_legacy_json_manifest(tmp_path):
+    legacy = tmp_path / "kb_manifest.json"
+    legacy.write_text(json.dumps({"sources": {
+        "/data/docs/a.pdf": {"file_hash": "h1", "chunks": ["c1"], "updated_at": 1.0},
+        "b.pdf": {"file_hash": "h2", "chunks": ["c2"], "updated_at": 2.0},
+    }}))
+
+    manifest = KnowledgeManifest(str(tmp_path / "kb_manifest.sqlite"))
+
+    assert manifest.is_unchanged("a.pdf", "h1")
+    assert manifest.chunk_ids("b.pdf") == ["c2"]
+    assert manifest.sources_under(["/data/docs"]) == {"a.pdf": "/data/docs/a.pdf"}
+    assert not legacy.exists()
+    manifest.close()
+
+
+def test_source_key_is_the_file_name():
+    assert source_key("/data/docs/Proposal.pdf") == "Proposal.pdf"
+    assert source_key("Proposal.pdf") == "Proposal.pdf"
@@ -0,0 +1,39 @@
+from knowledge_retrieval import _MAX_DIGEST_TERMS, _lexical_query, reciprocal_rank_fusion
+
+
+def test_rrf_ranks_ids_found_by_both_searches_first():
+    vector = ["a", "b", "c"]
+    lexical = ["c", "d", "a"]
+
+    fused = reciprocal_rank_fusion([vector, lexical])
+
+    assert fused[:2] == ["a", "c"]
+    assert set(fused) == {"a", "b", "c", "d"}
+
+
+def test_rrf_breaks_single_list_order_only_by_rank():
+    assert reciprocal_rank_fusion([["x", "y", "z"]]) == ["x", "y", "z"]
+    assert reciprocal_rank_fusion([]) == []
+
+
+def test_rrf_k_controls_how_much_top_ranks_dominate():
+    # "a" is first in one list and fourth in the other; "b" is second in both
+    ranked_lists = [["a", "b"], ["c", "b", "x", "a"]]
+
+    assert reciprocal_rank_fusion(ranked_lists, k=1)[0] == "a"
+    assert reciprocal_rank_fusion(ranked_lists, k=60)[0] == "b"
+
+
+def test_lexical_query_keeps_section_terms_and_top_digest_terms():
+    digest = " ".join(f"term{i} " * (20 - i) for i in range(20)) + " the and for"
+
+    terms = _lexical_query("Project Timeline and Milestones", digest).split()
+
+    assert terms[:3] == ["project", "timeline", "milestones"]
+    assert terms[3:] == [f"term{i}" for i in range(_MAX_DIGEST_TERMS)]
+
+
+def test_lexical_query_does_not_repeat_section_terms():
+    terms = _lexical_query("Pricing", "pricing pricing pricing budget").split()
+
+    assert terms == ["pricing", "budget"]
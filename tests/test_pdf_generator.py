@@ -0,0 +1,44 @@
+import os
+import stat
+import pytest
+from pdf_generator import create_formatted_pdf, estimate_column_widths
+
+
+def test_columns_that_fit_are_stretched_proportionally():
+    widths = estimate_column_widths([100, 200], 600, min_width=10)
+
+    assert widths == pytest.approx([200, 400])
+
+
+def test_narrow_columns_are_raised_to_the_minimum():
+    # 5 counts as 50, then both are stretched from 145 to 200
+    widths = estimate_column_widths([5, 95], 200, min_width=50)
+
+    assert widths == pytest.approx([50 * 200 / 145, 95 * 200 / 145])
+
+
+def test_narrow_columns_keep_their_width_when_the_table_overflows():
+    # The 50pt column fits in an equal share; the other two split the remaining 550pt 1:2
+    widths = estimate_column_widths([50, 400, 800], 600, min_width=10)
+
+    assert widths == pytest.approx([50, 550 / 3, 1100 / 3])
+
+
+def test_narrow_columns_are_found_repeatedly():
+    # 120 fits in a third of 600; 210 only fits in half of what is left once 120 is fixed
+    widths = estimate_column_widths([120, 210, 2000], 600, min_width=10)
+
+    assert widths == pytest.approx([120, 210, 270])
+    assert sum(widths) == pytest.approx(600)
+
+
+def test_pdfs_written_to_a_path_get_the_usual_file_mode(tmp_path):
+    path = tmp_path / "proposal.pdf"
+    plain = tmp_path / "plain.txt"
+    plain.write_text("")
+
+    create_formatted_pdf("# Title\n\nText.\n", output=str(path))
+
+    # Same mode as any new file under the umask, not mkstemp's owner-only 0600
+    assert stat.S_IMODE(path.stat().st_mode) == stat.S_IMODE(plain.stat().st_mode)
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,45 @@
+import multiprocessing
+import os
+import pytest
+import pdf_render_pool
+from pdf_render_pool import PDFRenderPool, RenderJob
+
+pytestmark = pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork", reason="workers must inherit the patched renderer"
+)
+
+
+def _crash_on_marker(markdown, **kwargs):
+    if "CRASH" in markdown:
+        # Like the OOM killer: the worker dies without raising
+        os._exit(1)
+    return _real_create_formatted_pdf(markdown, **kwargs)
+
+
+_real_create_formatted_pdf = pdf_render_pool.create_formatted_pdf
+
+
+def test_a_crashing_document_only_fails_itself(monkeypatch):
+    monkeypatch.setattr(pdf_render_pool, "create_formatted_pdf", _crash_on_marker)
+    jobs = [RenderJob(f"doc{i}", f"# Document {i}\n\nText.\n") for i in range(4)]
+    jobs.insert(2, RenderJob("bad", "# CRASH\n"))
+
+    with PDFRenderPool(max_workers=2) as pool:
+        results = pool.render_many(jobs)
+        # The pool is usable again afterwards
+        after = pool.render(RenderJob("after", "# After\n"))
+
+    assert [result.name for result in results] == [job.name for job in jobs]
+    assert [result.name for result in results if not result.ok] == ["bad"]
+    assert "crashed" in results[2].error
+    assert all(result.data.startswith(b"%PDF") for result in results if result.ok)
+    assert after.ok
+
+
+def test_submitting_to_a_broken_pool_returns_a_result():
+    with PDFRenderPool(max_workers=1) as pool:
+        # As if a worker died between two submissions
+        pool._executor._broken = "A child process terminated abruptly"
+        result = pool.render(RenderJob("good", "# Good\n"))
+
+    assert result.ok
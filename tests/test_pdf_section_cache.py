@@ -0,0 +1,69 @@
+from datetime import datetime
+import pytest
+from reportlab import rl_config
+from pdf_generator import create_formatted_pdf
+from pdf_section_cache import SectionFlowableCache
+
+GENERATED_ON = datetime(2024, 5, 1)
+
+
+@pytest.fixture(autouse=True)
+def invariant_pdfs(monkeypatch):
+    # Fixed document ids and timestamps, so equal content renders to equal bytes
+    monkeypatch.setattr(rl_config, "invariant", 1)
+
+
+def _parts(scope="We will deliver the platform in **three** phases."):
+    return [
+        "# Proposal for Acme - Platform\n\n",
+        "## Executive Summary\n\nAcme needs a faster pipeline.\n\n",
+        f"## Scope\n\n{scope}\n\n- Discovery\n- Build\n- Rollout\n\n",
+        "## Quotation\n\n| Item | Cost |\n|---|---|\n| Build | $10,000 |\n| Support | $2,000 |\n\n",
+    ]
+
+
+def _full_render(parts):
+    return create_formatted_pdf("".join(parts), generated_on=GENERATED_ON).getvalue()
+
+
+def test_incremental_render_matches_a_full_render():
+    cache = SectionFlowableCache()
+
+    first = cache.render(_parts(), generated_on=GENERATED_ON).getvalue()
+    second = cache.render(_parts(), generated_on=GENERATED_ON).getvalue()
+
+    assert first == _full_render(_parts())
+    assert second == first
+    assert (cache.misses, cache.hits) == (4, 4)
+
+
+def test_markers_do_not_pair_across_sections():
+    # Each underscore alone is literal; parsed whole, the two once formed one italic run spanning the sections
+    parts = [
+        "# Proposal for Acme\n\n",
+        "## Introduction\n\nWe use the my_var setting.\n\n",
+        "## Scope\n\nConfigure other_var next, then *review* it.\n\n",
+    ]
+
+    assert SectionFlowableCache().render(parts, generated_on=GENERATED_ON).getvalue() == _full_render(parts)
+
+
+def test_editing_one_section_rebuilds_only_that_section():
+    cache = SectionFlowableCache()
+    cache.render(_parts(), generated_on=GENERATED_ON)
+
+    edited = _parts(scope="We will deliver the platform in **two** phases.")
+    pdf = cache.render(edited, generated_on=GENERATED_ON).getvalue()
+
+    assert (cache.misses, cache.hits) == (5, 3)
+    assert pdf == _full_render(edited)
+
+
+def test_least_recently_used_sections_are_evicted():
+    cache = SectionFlowableCache(max_entries=2)
+    for part in _parts():
+        cache.flowables(part)
+
+    cache.flowables(_parts()[0])
+
+    assert cache.misses == 5
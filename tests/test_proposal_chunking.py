@@ -0,0 +1,60 @@
+from agno.document import Document
+from proposal_chunking import build_section_lookup, chunk_by_section, detect_section
+
+SECTIONS = ["Executive Summary", "Scope/Objectives", "Timelines", "Quotation"]
+
+
+def _sections(chunks):
+    return [chunk.meta_data["section"] for chunk in chunks]
+
+
+def test_detects_numbered_markdown_and_alias_headers():
+    lookup = build_section_lookup(SECTIONS)
+
+    assert detect_section("## 1. Executive Summary", lookup) == "Executive Summary"
+    assert detect_section("**II) Objectives:**", lookup) == "Scope/Objectives"
+    assert detect_section("Pricing", lookup) == "Quotation"
+    assert detect_section("Timeline", lookup) == "Timelines"
+    assert detect_section("Our pricing is described in the quotation below.", lookup) is None
+    assert detect_section("Executive Summary " + "x" * 80, lookup) is None
+
+
+def test_text_before_the_first_header_is_untagged():
+    documents = [Document(name="past.pdf", content="Acme Corp\nConfidential\n# Executive Summary\nWe propose...")]
+
+    chunks = chunk_by_section(documents, SECTIONS)
+
+    assert _sections(chunks) == [None, "Executive Summary"]
+    assert chunks[0].content == "Acme Corp\nConfidential"
+    assert chunks[1].content.startswith("# Executive Summary")
+    assert [chunk.meta_data["chunk"] for chunk in chunks] == [1, 2]
+    assert {chunk.name for chunk in chunks} == {"past.pdf"}
+
+
+def test_sections_keep_their_tag_across_pages():
+    documents = [
+        Document(name="past.pdf", content="Scope of Work\nPhase one"),
+        Document(name="past.pdf_2", content="Phase two\nPricing\n$10,000"),
+    ]
+
+    chunks = chunk_by_section(documents, SECTIONS)
+
+    assert _sections(chunks) == ["Scope/Objectives", "Quotation"]
+    assert "Phase two" in chunks[0].content
+
+
+def test_long_sections_are_split_between_lines():
+    lines = [f"line {i:03d} " + "x" * 40 for i in range(30)]
+    documents = [Document(name="past.pdf", content="Timelines\n" + "\n".join(lines))]
+
+    chunks = chunk_by_section(documents, SECTIONS, chunk_size=200)
+
+    assert len(chunks) > 1
+    assert set(_sections(chunks)) == {"Timelines"}
+    assert all(len(chunk.content) <= 200 for chunk in chunks)
+    # No line is cut in two
+    assert "\n".join(chunk.content for chunk in chunks) == "Timelines\n" + "\n".join(lines)
+
+
+def test_empty_input_gives_no_chunks():
+    assert chunk_by_section([], SECTIONS) == []
@@ -0,0 +1,83 @@
+import time
+import pytest
+from agno.agent import Agent, RunResponse
+from agno.exceptions import ModelProviderError
+from agno.models.google import Gemini
+from prompt_cache import PromptCache
+
+
+@pytest.fixture
+def section_based_agent(monkeypatch):
+    streamlit = pytest.importorskip("streamlit")
+    # The module reads the API key from Streamlit secrets on import
+    monkeypatch.setattr(streamlit, "secrets", {"google_api_key": "test"})
+    import section_based_agent
+
+    return section_based_agent
+
+
+class StubAgent(Agent):
+    """Answers with the section it was asked for instead of calling the model."""
+
+    # Shared by the copies made for each section: (section, session_id)
+    runs = []
+
+    def run(self, message=None, **kwargs):
+        section = message.rsplit("SECTION TO WRITE: ", 1)[1].split("\n", 1)[0]
+        self.runs.append((section, self.session_id))
+        return RunResponse(content=f"{section} content")
+
+
+def test_sections_are_generated_concurrently_on_separate_agents(section_based_agent, monkeypatch):
+    monkeypatch.setattr(StubAgent, "runs", [])
+    agent = StubAgent(
+        model=Gemini(id=section_based_agent.MODEL_ID, api_key="test"),
+        system_message="You write proposals.",
+        session_id="original",
+    )
+    generator = section_based_agent.SectionBasedProposalGenerator(agent)
+
+    sections = generator.generate_sections_concurrently("Digest of the client requirements", max_workers=3)
+
+    assert list(sections) == generator.sections
+    assert all(content == f"{section} content" for section, content in sections.items())
+    assert sorted(section for section, _ in StubAgent.runs) == sorted(generator.sections)
+    # Every section ran on its own copy of the agent, never on the shared original
+    session_ids = [session_id for _, session_id in StubAgent.runs]
+    assert len(set(session_ids)) == len(session_ids)
+    assert "original" not in session_ids
+    assert agent.session_id == "original"
+
+
+class ExpiredCacheAgent(StubAgent):
+    """Rejects every request that uses cached content, as Gemini does once a cache is deleted."""
+
+    def run(self, message=None, **kwargs):
+        if getattr(self.model, "cached_content", None):
+            raise ModelProviderError("404 NOT_FOUND: CachedContent not found", status_code=404)
+        return super().run(message, **kwargs)
+
+
+def test_a_failed_prompt_cache_is_not_recreated_for_later_sections(section_based_agent, monkeypatch):
+    monkeypatch.setattr(StubAgent, "runs", [])
+    created = []
+
+    def create_prompt_cache(model, system_instruction, prefix):
+        created.append(prefix)
+        return PromptCache(name=f"cachedContents/{len(created)}", expires_at=time.time() + 3600)
+
+    monkeypatch.setattr(section_based_agent, "create_prompt_cache", create_prompt_cache)
+    monkeypatch.setattr(section_based_agent, "delete_prompt_cache", lambda model, cache: None)
+    agent = ExpiredCacheAgent(model=Gemini(id=section_based_agent.MODEL_ID, api_key="test"), system_message="You write proposals.")
+    generator = section_based_agent.SectionBasedProposalGenerator(agent)
+
+    contents = [generator.generate_section(section, "Digest") for section in generator.sections[:3]]
+
+    assert contents == [f"{section} content" for section in generator.sections[:3]]
+    assert len(created) == 1
+    assert generator.prompt_cache is None
+
+    # The next proposal may try caching again
+    generator.release_prompt_cache()
+    generator.generate_section(generator.sections[0], "Digest")
+    assert len(created) == 2
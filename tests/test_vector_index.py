@@ -0,0 +1,10 @@
+import pytest
+from vector_index import num_sub_vectors
+
+
+@pytest.mark.parametrize("dimensions, expected", [(768, 48), (1536, 96), (3072, 192), (100, 5), (8, 1), (97, 1)])
+def test_sub_vectors_divide_the_dimensions(dimensions, expected):
+    count = num_sub_vectors(dimensions)
+
+    assert count == expected
+    assert dimensions % count == 0
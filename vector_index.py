@@ -0,0 +1,237 @@
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Optional
+import json
+import math
+import os
+import threading
+import time
+import pyarrow as pa
+from agno.utils.log import logger
+
+# LanceDB names distance metrics slightly differently from agno's Distance enum
+_METRICS = {"cosine": "cosine", "l2": "l2", "max_inner_product": "dot"}
+
+# Plain chunk text for full-text search; `payload` is JSON, so indexing it would also match keys and names
+TEXT_COLUMN = "content"
+
+# Rows filled per write when copying chunk text out of existing payloads
+_TEXT_BACKFILL_BATCH_SIZE = 5000
+
+
+@dataclass
+class VectorIndexSettings:
+    """ANN index and search settings for the proposal vector store."""
+
+    # Below this many rows a brute-force scan is fast enough and no index is built
+    min_rows: int = 5000
+    # Retrain the index once the table has grown by this factor since the last build
+    rebuild_growth: float = 2.0
+    # "IVF_PQ" or one of LanceDB's HNSW variants such as "IVF_HNSW_SQ"
+    index_type: str = "IVF_PQ"
+    nprobes: int = 20
+    # Re-rank this many times `limit` candidates with full vectors to undo PQ error
+    refine_factor: Optional[int] = 10
+    # Drop table versions older than this when compacting
+    cleanup_older_than: timedelta = timedelta(days=1)
+
+
+default_index_settings = VectorIndexSettings()
+
+# One lock per LanceDB table in this process, see table_lock
+_table_locks: Dict[str, threading.RLock] = {}
+_table_locks_guard = threading.Lock()
+
+
+def table_lock(vector_db) -> threading.RLock:
+    """Process-wide lock for a LanceDB table.
+
+    The knowledge base's LanceDb handle is shared by every session and the
+    ingestion worker, so replacing its `table` and writing through it happen
+    under this lock. Re-entrant: writers call helpers that take it again.
+    """
+    key = f"{vector_db.uri}:{vector_db.table_name}"
+    with _table_locks_guard:
+        if key not in _table_locks:
+            _table_locks[key] = threading.RLock()
+        return _table_locks[key]
+
+
+def refresh_table(vector_db, wait: bool = True):
+    """Re-open the table so rows added by other writers are visible, and return it.
+
+    With wait=False a reader doesn't queue behind a writer holding the lock
+    (e.g. during an index build); it gets the current handle, which stays readable.
+    """
+    lock = table_lock(vector_db)
+    if not lock.acquire(blocking=wait or vector_db.table is None):
+        return vector_db.table
+    try:
+        if vector_db.connection:
+            vector_db.table = vector_db.connection.open_table(name=vector_db.table_name)
+        return vector_db.table
+    finally:
+        lock.release()
+
+
+def distance_metric(vector_db) -> str:
+    """Return the LanceDB metric name for a LanceDb vector store."""
+    distance = getattr(vector_db.distance, "value", vector_db.distance)
+    return _METRICS.get(distance, "cosine")
+
+
+def index_state_path(vector_db) -> str:
+    """Index build metadata lives next to the LanceDB directory, like the manifest."""
+    parent = os.path.dirname(str(vector_db.uri).rstrip("/"))
+    return os.path.join(parent, f"{vector_db.table_name}_index.json")
+
+
+def _load_state(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return {}
+
+
+def _has_vector_index(table, vector_column: str) -> bool:
+    return any(vector_column in index.columns for index in table.list_indices())
+
+
+def backfill_text_column(vector_db) -> int:
+    """Copy chunk text out of the JSON payload for rows whose text column is empty.
+
+    Covers rows written before the column existed and rows added through
+    agno's own LanceDb.insert, which only writes the payload.
+    """
+    with table_lock(vector_db):
+        table = vector_db.table
+        if table is None or TEXT_COLUMN not in table.schema.names:
+            return 0
+        filled = 0
+        while True:
+            rows = (
+                table.search()
+                .where(f"{TEXT_COLUMN} IS NULL")
+                .select([vector_db._id, "payload"])
+                .limit(_TEXT_BACKFILL_BATCH_SIZE)
+                .to_list()
+            )
+            if not rows:
+                return filled
+            # An empty string, not NULL, for payloads without content, so they aren't picked up again
+            texts = [(json.loads(row["payload"] or "{}").get("content") or "") for row in rows]
+            table.merge_insert(vector_db._id).when_matched_update_all().execute(
+                pa.table({vector_db._id: [row[vector_db._id] for row in rows], TEXT_COLUMN: texts})
+            )
+            filled += len(rows)
+
+
+def ensure_text_column(vector_db) -> None:
+    """Add the plain-text column searched by full-text queries, filling it for existing rows."""
+    with table_lock(vector_db):
+        table = vector_db.table
+        if table is None or TEXT_COLUMN in table.schema.names:
+            return
+        table.add_columns({TEXT_COLUMN: "CAST(NULL AS STRING)"})
+        backfill_text_column(vector_db)
+
+
+def ensure_fts_index(vector_db) -> None:
+    """Create the local BM25 full-text index on chunk text if it doesn't exist yet."""
+    table = vector_db.table
+    if table is None:
+        return
+    fts_indices = [index for index in table.list_indices() if index.index_type == "FTS"]
+    if any(TEXT_COLUMN in index.columns for index in fts_indices):
+        return
+    with table_lock(vector_db):
+        ensure_text_column(vector_db)
+        # Native (non-tantivy) FTS indices are updated incrementally by table.optimize()
+        table.create_fts_index(TEXT_COLUMN, replace=True, use_tantivy=False)
+        # Earlier versions indexed the raw JSON payload
+        for index in fts_indices:
+            if "payload" in index.columns:
+                table.drop_index(index.name)
+
+
+def ensure_section_index(vector_db) -> None:
+    """Index the low-cardinality `section` column so filtered searches skip other sections."""
+    table = vector_db.table
+    if table is None or "section" not in table.schema.names:
+        return
+    if not any("section" in index.columns for index in table.list_indices()):
+        table.create_scalar_index("section", index_type="BITMAP")
+
+
+def num_sub_vectors(dimensions: int, dimensions_per_sub_vector: int = 16) -> int:
+    """PQ sub-vector count: about 16 dimensions each, and always a divisor of `dimensions` as IVF_PQ requires."""
+    target = max(1, dimensions // dimensions_per_sub_vector)
+    return next(count for count in range(target, 0, -1) if dimensions % count == 0)
+
+
+def build_vector_index(vector_db, settings: VectorIndexSettings = default_index_settings) -> None:
+    """(Re)build the ANN index sized for the current number of rows."""
+    table = vector_db.table
+    num_rows = table.count_rows()
+    dimensions = table.schema.field(vector_db._vector_col).type.list_size
+
+    index_kwargs = {
+        "metric": distance_metric(vector_db),
+        "vector_column_name": vector_db._vector_col,
+        "index_type": settings.index_type,
+        # About sqrt(N) partitions of about sqrt(N) rows each
+        "num_partitions": max(1, min(4096, int(math.sqrt(num_rows)))),
+        "replace": True,
+    }
+    if settings.index_type.endswith("PQ"):
+        index_kwargs["num_sub_vectors"] = num_sub_vectors(dimensions)
+
+    started = time.time()
+    table.create_index(**index_kwargs)
+    logger.info(f"Built {settings.index_type} index on {num_rows} rows in {time.time() - started:.1f}s")
+
+    state_path = index_state_path(vector_db)
+    with open(state_path, "w") as f:
+        json.dump({"trained_rows": num_rows, "index_type": settings.index_type, "built_at": time.time()}, f)
+
+
+def maintain_vector_store(vector_db, settings: VectorIndexSettings = default_index_settings) -> None:
+    """Compact fragments after upserts and build or retrain the ANN index when needed."""
+    with table_lock(vector_db):
+        _maintain_vector_store(vector_db, settings)
+
+
+def _maintain_vector_store(vector_db, settings: VectorIndexSettings) -> None:
+    table = refresh_table(vector_db)
+    if table is None:
+        return
+
+    try:
+        backfill_text_column(vector_db)
+        # Merges the small fragments left by each add and folds new rows into existing indices
+        table.optimize(cleanup_older_than=settings.cleanup_older_than)
+        ensure_fts_index(vector_db)
+        ensure_section_index(vector_db)
+
+        num_rows = table.count_rows()
+        if num_rows < settings.min_rows:
+            return
+
+        state = _load_state(index_state_path(vector_db))
+        trained_rows = state.get("trained_rows", 0)
+        if (
+            not _has_vector_index(table, vector_db._vector_col)
+            or state.get("index_type") != settings.index_type
+            or num_rows >= trained_rows * settings.rebuild_growth
+        ):
+            build_vector_index(vector_db, settings)
+    except Exception as e:
+        logger.error(f"Error maintaining vector index: {e}")
+
+
+def apply_search_settings(query, vector_db, settings: VectorIndexSettings = default_index_settings):
+    """Apply metric, nprobes and refine settings to a LanceDB vector query."""
+    query = query.distance_type(distance_metric(vector_db)).nprobes(settings.nprobes)
+    if settings.refine_factor:
+        query = query.refine_factor(settings.refine_factor)
+    return query